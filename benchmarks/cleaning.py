@@ -0,0 +1,57 @@
+"""
+Benchmark CleaningPipeline against the per-row clean_arabic_text.
+
+Run from the project root:
+    python -m benchmarks.cleaning --rows 200000
+
+Texts are the bundled outputs/data/*.csv files. Parity of both paths
+with clean_arabic_text is checked in tests/test_arabic_text.py.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.arabic_text import clean_arabic_text, CleaningPipeline
+
+
+DATA_DIR = Path("outputs/data")
+FLAGS = dict.fromkeys(["remove", "replace_light", "replace_aggressive", "stopwords"], True)
+
+
+def load_texts() -> pd.Series:
+    return pd.concat(
+        [pd.read_csv(path)["text"] for path in sorted(DATA_DIR.glob("*.csv"))],
+        ignore_index=True,
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    texts = load_texts()
+
+    corpus = pd.Series((texts.tolist() * (args.rows // len(texts) + 1))[:args.rows])
+    pipeline = CleaningPipeline(**FLAGS)
+
+    ref_time = timed(corpus.apply, lambda x: clean_arabic_text(x, **FLAGS))
+    row_time = timed(corpus.apply, pipeline)
+    batch_time = timed(pipeline.clean_series, corpus)
+
+    print(f"Rows              : {len(corpus)}")
+    print(f"clean_arabic_text : {ref_time:.3f} s")
+    print(f"CleaningPipeline  : {row_time:.3f} s ({ref_time / row_time:.2f}x)")
+    print(f"clean_series      : {batch_time:.3f} s ({ref_time / batch_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput and quality of the MinHash LSH near-duplicate search.
+
+Run from the project root:
+    python -m benchmarks.dedup --rows 1000000
+
+Synthetic texts are built from a few thousand random word sequences,
+each copied several times with a few words replaced, so every base
+text has a cluster of near duplicates. The script reports hashing and
+clustering throughput, and for a uniform sample of base texts scores
+every pair of their copies with exact Jaccard similarity of the
+shingle sets: recall is the share of pairs above the threshold that
+share a cluster, recall at the threshold the same for pairs within
+0.05 of it (next to the S-curve's prediction), and precision the share
+of same-cluster pairs that are above threshold - 0.1.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.dedup import cluster_stats, iter_band_keys, lsh_clusters, lsh_params
+
+
+def synthetic_texts(rows: int, copies: int, edits: int, seed: int = 0) -> tuple[list[str], np.ndarray]:
+    """
+    Texts and the base text (family) each one was copied from.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"كلمة{i}" for i in range(20_000)])
+    bases = rows // copies
+    words = vocabulary[rng.integers(0, len(vocabulary), (bases, 20))]
+
+    texts = []
+    for copy in range(copies):
+        edited = words.copy()
+        if copy:
+            positions = rng.integers(0, words.shape[1], (bases, edits))
+            np.put_along_axis(edited, positions, vocabulary[rng.integers(0, len(vocabulary), (bases, edits))], axis=1)
+        texts += [" ".join(row) for row in edited]
+    families = np.tile(np.arange(bases), copies)
+    order = rng.permutation(len(texts))
+    return [texts[i] for i in order], families[order]
+
+
+def exact_jaccard(texts: list[str], k: int) -> np.ndarray:
+    sets = [{text[i:i + k] for i in range(max(1, len(text) - k + 1))} for text in texts]
+    n = len(sets)
+    similarity = np.eye(n)
+    for i in range(n):
+        for j in range(i + 1, n):
+            similarity[i, j] = similarity[j, i] = len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+    return similarity
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument("--edits", type=int, default=2)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--ngram", type=int, default=5)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sample", type=int, default=1_000, help="Rows checked against exact Jaccard, as whole families")
+    args = parser.parse_args()
+
+    texts, families = synthetic_texts(args.rows, args.copies, args.edits)
+    bands, rows = lsh_params(args.threshold, args.num_perm)
+
+    start = time.perf_counter()
+    chunks = (texts[offset:offset + args.chunksize] for offset in range(0, len(texts), args.chunksize))
+    keys = np.concatenate(list(iter_band_keys(chunks, "char", args.ngram, args.num_perm, bands, workers=args.workers, rows=rows)))
+    hash_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clusters = lsh_clusters(keys)
+    cluster_seconds = time.perf_counter() - start
+    stats = cluster_stats(clusters)
+
+    print(f"Rows: {len(texts)}, {bands} bands x {rows} rows of {args.num_perm}, band keys {keys.nbytes / 1024 ** 2:.1f} MB")
+    print(f"Hash   : {hash_seconds:.2f} s ({len(texts) / hash_seconds:.0f} rows/sec)")
+    print(f"Cluster: {cluster_seconds:.2f} s ({len(texts) / cluster_seconds:.0f} rows/sec)")
+    print(f"Clusters: {stats['clusters']} ({stats['duplicate_clusters']} with duplicates, largest {stats['largest_cluster']})")
+
+    # families drawn uniformly, whatever LSH made of them; every pair within a family is scored
+    rng = np.random.default_rng(1)
+    sampled = rng.choice(families.max() + 1, size=max(1, args.sample // args.copies), replace=False)
+    same_cluster, similarity = [], []
+    for family in sampled:
+        members = np.flatnonzero(families == family)
+        upper = np.triu_indices(len(members), k=1)
+        similarity.append(exact_jaccard([texts[i] for i in members], args.ngram)[upper])
+        same_cluster.append((clusters[members][:, None] == clusters[members][None, :])[upper])
+    similarity = np.concatenate(similarity)
+    same_cluster = np.concatenate(same_cluster)
+
+    similar = similarity >= args.threshold
+    recall = (similar & same_cluster).sum() / max(similar.sum(), 1)
+    near = np.abs(similarity - args.threshold) <= 0.05
+    recall_near = (near & same_cluster).sum() / max(near.sum(), 1)
+    expected = 1 - (1 - args.threshold ** rows) ** bands
+    precision = (same_cluster & (similarity >= args.threshold - 0.1)).sum() / max(same_cluster.sum(), 1)
+    print(f"Sample of {len(sampled)} families, {len(similarity)} pairs: recall {recall:.3f}, precision {precision:.3f}")
+    print(f"Recall at threshold {args.threshold} +- 0.05: {recall_near:.3f} over {near.sum()} pairs (S-curve at threshold: {expected:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+CLI startup time, with a regression budget.
+
+Run from the project root:
+    python -m benchmarks.startup --repeat 5
+
+Each command line runs `python -X importtime main.py ...` in a fresh
+process. The script reports the median wall time, the total import
+time, and the slowest top-level imports. It exits with status 1 if a
+command goes over its budget, so it can guard against an eager heavy
+import coming back.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+# command line -> startup budget in seconds
+BUDGETS = {
+    "--help": 0.5,
+    "eda --help": 1.0,
+    "eda histogram --help": 1.0,
+    "text --help": 1.0,
+}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int]]:
+    """
+    (module, cumulative microseconds) for each top-level import.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # nested imports are indented under the module that imported them
+        if not name[1:].startswith(" "):
+            imports.append((name.strip(), int(cumulative)))
+    return imports
+
+
+def measure(command: str, repeat: int) -> tuple[float, list[tuple[str, int]]]:
+    args = [sys.executable, "-X", "importtime", "main.py", *command.split()]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(args, capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"'{command}' failed:\n{result.stderr[-2000:]}")
+    return statistics.median(times), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports shown per command")
+    args = parser.parse_args()
+
+    over_budget = []
+    for command, budget in BUDGETS.items():
+        wall, imports = measure(command, args.repeat)
+        total_ms = sum(us for _, us in imports) / 1000
+        status = "ok" if wall <= budget else "OVER BUDGET"
+        print(f"main.py {command:<22}: {wall * 1000:6.0f} ms wall, {total_ms:6.0f} ms imports "
+              f"(budget {budget * 1000:.0f} ms) {status}")
+        for name, us in sorted(imports, key=lambda item: -item[1])[:args.top]:
+            print(f"    {us / 1000:7.1f} ms  {name}")
+        if wall > budget:
+            over_budget.append(command)
+
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
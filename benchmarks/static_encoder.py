@@ -0,0 +1,156 @@
+"""
+Benchmark the NumPy StaticEncoder against SentenceTransformer.
+
+Run from the project root:
+    python -m benchmarks.static_encoder --model path/to/model2vec-model --rows 100000
+
+--model takes a Hugging Face id or a local directory holding
+model.safetensors and tokenizer.json (a model2vec or sentence-transformers
+StaticEmbedding layout); it defaults to the tiny fixture model of the
+tests. Vectors are first checked against a plain per-text loop that reads
+the table with safetensors and tokenizes with a separately loaded
+tokenizer, and against SentenceTransformer when it is installed. Each
+encoder is then timed in a fresh process so that peak RSS includes its
+imports and model load. tests/test_static_encoder.py checks the encoder
+against hand-computed vectors.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.static_encoder import StaticEncoder, resolve_model_dir
+
+
+DATA_DIR = Path("outputs/data")
+FIXTURE_MODEL = Path("tests/fixtures/tiny_static_model")
+ATOL = 1e-5
+
+
+def load_texts() -> list[str]:
+    return pd.concat(
+        [pd.read_csv(path)["text"] for path in sorted(DATA_DIR.glob("*.csv"))],
+        ignore_index=True,
+    ).astype(str).tolist()
+
+
+def reference_encode(model: str, texts: list[str]) -> np.ndarray:
+    """
+    Lookup-and-mean per text, sharing no code with StaticEncoder.
+    """
+    from safetensors.numpy import load_file
+    from tokenizers import Tokenizer
+
+    model_dir = resolve_model_dir(model)
+    tensors = load_file(str(model_dir / "model.safetensors"))
+    table = next(tensors[k] for k in ("embeddings", "embedding.weight") if k in tensors).astype(np.float32)
+    tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+    tokenizer.no_padding()
+
+    out = np.zeros((len(texts), table.shape[1]), dtype=np.float32)
+    for i, text in enumerate(texts):
+        ids = tokenizer.encode(text, add_special_tokens=False).ids
+        if ids:
+            vector = table[ids].mean(axis=0)
+            out[i] = vector / max(np.linalg.norm(vector), 1e-12)
+    return out
+
+
+def st_encode(model: str, texts: list[str], batch_size: int) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model).encode(
+        texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+    )
+
+
+def check_parity(model: str, texts: list[str], batch_size: int):
+    encoder = StaticEncoder(model)
+    vectors = encoder.encode(texts, batch_size=batch_size)
+
+    diff = np.abs(vectors - reference_encode(model, texts)).max()
+    print(f"Max abs diff vs reference loop          : {diff:.2e}")
+    assert diff <= ATOL, "StaticEncoder differs from the reference loop"
+
+    try:
+        expected = st_encode(model, texts, batch_size)
+    except ImportError:
+        print("sentence-transformers not installed, skipping its parity check")
+        return
+
+    diff = np.abs(vectors - expected).max()
+    print(f"Max abs diff vs SentenceTransformer     : {diff:.2e}")
+    assert diff <= ATOL, "StaticEncoder differs from SentenceTransformer"
+
+
+def run_engine(engine: str, model: str, rows: int, batch_size: int) -> dict:
+    """
+    Load and encode in this process; reports latency and peak RSS.
+    """
+    start = time.perf_counter()
+    if engine == "native":
+        encoder = StaticEncoder(model)
+        encode = lambda texts: encoder.encode(texts, batch_size=batch_size)
+    else:
+        from sentence_transformers import SentenceTransformer
+        st_model = SentenceTransformer(model)
+        encode = lambda texts: st_model.encode(
+            texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+    load_time = time.perf_counter() - start
+
+    texts = load_texts()
+    corpus = (texts * (rows // len(texts) + 1))[:rows]
+
+    start = time.perf_counter()
+    encode(corpus)
+    encode_time = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"load": load_time, "encode": encode_time, "rows": rows, "peak_mb": peak_mb}
+
+
+def measure(engine: str, args) -> dict | None:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.static_encoder", "--model", args.model,
+         "--rows", str(args.rows), "--batch-size", str(args.batch_size), "--engine", engine],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=str(FIXTURE_MODEL))
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--engine", choices=["native", "sentence-transformers"])
+    args = parser.parse_args()
+
+    if args.engine:
+        print(json.dumps(run_engine(args.engine, args.model, args.rows, args.batch_size)))
+        return
+
+    check_parity(args.model, load_texts(), args.batch_size)
+
+    for engine in ["native", "sentence-transformers"]:
+        stats = measure(engine, args)
+        if stats is None:
+            print(f"{engine:<22}: not available")
+            continue
+        print(
+            f"{engine:<22}: load {stats['load']:.2f} s, encode {stats['encode']:.2f} s "
+            f"({stats['rows'] / stats['encode']:,.0f} rows/s), peak RSS {stats['peak_mb']:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
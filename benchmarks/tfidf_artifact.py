@@ -0,0 +1,98 @@
+"""
+Compare the saved VocabularyTfidf artifact with a pickled TfidfVectorizer.
+
+Run from the project root:
+    python -m benchmarks.tfidf_artifact --ngram-max 3
+
+A vectorizer is fitted on the bundled outputs/data/*.csv files, then
+saved both ways. For each artifact the script reports size on disk,
+load time, Python memory allocated while loading (tracemalloc) and
+transform time; transformed matrices must match the vectorizer.
+"""
+import argparse
+import pickle
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.tfidf import VocabularyTfidf
+
+
+DATA_DIR = Path("outputs/data")
+
+
+def load_texts() -> list[str]:
+    return pd.concat(
+        [pd.read_csv(path)["text"] for path in sorted(DATA_DIR.glob("*.csv"))],
+        ignore_index=True,
+    ).astype(str).tolist()
+
+
+def size_mb(path: Path) -> float:
+    files = path.iterdir() if path.is_dir() else [path]
+    return sum(f.stat().st_size for f in files) / (1024 ** 2)
+
+
+def measure_load(load, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    artifact = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return artifact, float(np.median(times)), peak / (1024 ** 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ngram-max", type=int, default=2)
+    parser.add_argument("--max-features", type=int, default=None)
+    args = parser.parse_args()
+
+    texts = load_texts()
+    vectorizer = TfidfVectorizer(ngram_range=(1, args.ngram_max), max_features=args.max_features).fit(texts)
+    expected = vectorizer.transform(texts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = Path(tmp) / "vectorizer.pkl"
+        with open(pickle_path, "wb") as f:
+            pickle.dump(vectorizer, f)
+
+        artifact_path = Path(tmp) / "vectorizer.tfidf"
+        VocabularyTfidf.from_vectorizer(vectorizer).save(artifact_path)
+
+        def load_pickle():
+            with open(pickle_path, "rb") as f:
+                return pickle.load(f)
+
+        candidates = [
+            ("pickle", pickle_path, load_pickle),
+            ("artifact", artifact_path, lambda: VocabularyTfidf.load(artifact_path)),
+        ]
+
+        print(f"Terms: {len(vectorizer.vocabulary_)}, documents: {len(texts)}")
+        for name, path, load in candidates:
+            artifact, load_time, load_mb = measure_load(load)
+
+            start = time.perf_counter()
+            X = artifact.transform(texts)
+            transform_time = time.perf_counter() - start
+
+            assert abs(X - expected).max() < 1e-12, f"{name} transform differs"
+            print(
+                f"{name:<9}: {size_mb(path):.2f} MB on disk, load {load_time * 1000:.1f} ms, "
+                f"{load_mb:.2f} MB allocated, transform {transform_time:.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
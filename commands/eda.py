@@ -1,60 +1,95 @@
 import typer
-from utils.data_handler import load_class_distribution
+from typing import List
+from utils.data_handler import DEFAULT_CHUNKSIZE, collect_eda_stats
 from utils.visualization import (
     plot_class_distribution_pie,
     plot_class_distribution_bar,
 )
-from utils.data_handler import load_text_length
 from utils.visualization import (
     plot_text_length_histogram_word,
     plot_text_length_histogram_char,
 )
-from utils.visualization import print_numeric_summary
+from utils.visualization import print_numeric_summary, print_summary
 
 eda_app = typer.Typer(help="Exploratory Data Analysis commands")
 
 
+def _plot_distribution(class_counts: dict, plot_type: str):
+    if plot_type == "pie":
+        plot_class_distribution_pie(class_counts)
+    elif plot_type == "bar":
+        plot_class_distribution_bar(class_counts)
+    else:
+        raise typer.BadParameter("plot_type must be either 'pie' or 'bar'")
+
+
+def _bin_edges(lengths, bins: str):
+    try:
+        return lengths.bin_edges(bins)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+
 @eda_app.command()
 def distribution(csv_path: str = typer.Option(..., help="Path to CSV file"),
                  label_col: str = typer.Option(..., help="Label column name"),
-                 plot_type: str = typer.Option("pie",help="Plot type: pie or bar",),):
+                 plot_type: str = typer.Option("pie",help="Plot type: pie or bar",),
+                 chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, help="Rows read per chunk"),):
     """
     View class distribution as a plot.
     """
-    
-    class_counts = load_class_distribution(csv_path, label_col)
+
+    class_counts = collect_eda_stats(csv_path, label_col=label_col, chunksize=chunksize).class_distribution()
     print_numeric_summary(list(class_counts.values()),"Class Distribution")
 
-    if plot_type == "pie":
-        plot_class_distribution_pie(class_counts)
-    elif plot_type == "bar":
-        plot_class_distribution_bar(class_counts)
-    else:
-        raise typer.BadParameter("plot_type must be either 'pie' or 'bar'")
-    
+    _plot_distribution(class_counts, plot_type)
+
 
 @eda_app.command()
 def histogram(csv_path: str = typer.Option(..., help="Path to CSV file"),
               text_col: str = typer.Option(..., help="Text column name"),
               plot_type: str = typer.Option("word", help="Histogram type: word or char",),
-              bins: str = typer.Option("auto", help="Bins strategy: auto, or any number",),):
+              bins: str = typer.Option("auto", help="Bins strategy: auto, or any number",),
+              chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, help="Rows read per chunk"),):
     """
     View text length histogram.
     """
 
-    text_counts_word, text_counts_char = load_text_length(
-        csv_path, text_col
-    )
+    stats = collect_eda_stats(csv_path, text_col=text_col, chunksize=chunksize)
 
     if plot_type == "word":
-        plot_text_length_histogram_word(text_counts_word, bins=bins)
-        print_numeric_summary(text_counts_word, "Word Length")
+        edges = _bin_edges(stats.words, bins)
+        plot_text_length_histogram_word(stats.words.values, bins=edges, weights=stats.words.weights)
+        print_summary(stats.words.summary(), "Word Length")
 
     elif plot_type == "char":
-        plot_text_length_histogram_char(text_counts_char, bins=bins)
-        print_numeric_summary(text_counts_word, "Char Length")
+        edges = _bin_edges(stats.chars, bins)
+        plot_text_length_histogram_char(stats.chars.values, bins=edges, weights=stats.chars.weights)
+        print_summary(stats.chars.summary(), "Char Length")
 
     else:
         raise typer.BadParameter("plot_type must be either 'word' or 'char'")
 
 
+@eda_app.command()
+def report(csv_path: List[str] = typer.Option(..., help="Path to CSV file (repeat to combine several files)"),
+           text_col: str = typer.Option(..., help="Text column name"),
+           label_col: str = typer.Option(..., help="Label column name"),
+           plot_type: str = typer.Option("pie",help="Class plot type: pie or bar",),
+           bins: str = typer.Option("auto", help="Bins strategy: auto, or any number",),
+           chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, help="Rows read per chunk"),):
+    """
+    Class distribution and both length histograms in a single pass.
+    """
+
+    stats = collect_eda_stats(csv_path, text_col=text_col, label_col=label_col, chunksize=chunksize)
+
+    class_counts = stats.class_distribution()
+    print_numeric_summary(list(class_counts.values()),"Class Distribution")
+    _plot_distribution(class_counts, plot_type)
+
+    plot_text_length_histogram_word(stats.words.values, bins=_bin_edges(stats.words, bins), weights=stats.words.weights)
+    print_summary(stats.words.summary(), "Word Length")
+
+    plot_text_length_histogram_char(stats.chars.values, bins=_bin_edges(stats.chars, bins), weights=stats.chars.weights)
+    print_summary(stats.chars.summary(), "Char Length")
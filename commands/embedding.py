@@ -1,40 +1,146 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sentence_transformers import SentenceTransformer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
 from pathlib import Path
-import pandas as pd
 import numpy as np
 import pickle
 import typer
+from typing import Optional
+
+from utils.data_handler import DEFAULT_CHUNKSIZE, TextIndex, iter_batches, load_cleaning, save_cleaning
+from utils.embedding_store import (
+    STORAGE_DTYPES, STORE_SUFFIX, EmbeddingWriter, SparseEmbeddingWriter, save_embeddings, store_size_mb,
+)
+from utils.tfidf import DEFAULT_N_FEATURES, HashingTfidf, VocabularyTfidf, encode_terms, iter_transform, load_tfidf
+from utils.embedding_cache import DEFAULT_CACHE_PATH, EmbeddingCache
+from utils.sentence_encoder import load_sentence_encoder
+from utils.static_encoder import model_revision
 
 
 embedding_app = typer.Typer()
+DEFAULT_MODEL2VEC_MODEL = "JadwalAlmaa/model2vec-ARBERTv2"
 DEFAULT_EMBEDDINGS_DIR = Path(
     r"C:\Users\HP\Desktop\SDAIA_BOOTCAMP5\nlp-cli-tool\outputs\embeddings"
 )
+
+
+def resolve_output(output: Path) -> Path:
+    """
+    Output goes to an embedding store directory (.emb) unless a .pkl
+    file is asked for explicitly.
+    """
+    if output.parent == Path("."):
+        output = DEFAULT_EMBEDDINGS_DIR / output
+
+    if output.suffix != ".pkl":
+        output = output.with_suffix(STORE_SUFFIX)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    return output
+
+
+def check_dtype(dtype: str, output: Path):
+    if dtype not in STORAGE_DTYPES:
+        raise typer.BadParameter(f"dtype must be one of {', '.join(STORAGE_DTYPES)}")
+    if dtype == "int8" and output.suffix == ".pkl":
+        raise typer.BadParameter("int8 needs an embedding store output (.emb), its scales are stored next to the matrix")
+
+
+def fit_tfidf_unique(uniques: list[str], ids: np.ndarray, max_features: int, ngram_range: tuple):
+    """
+    Same matrix as TfidfVectorizer(...).fit_transform(texts), where
+    texts[i] == uniques[ids[i]], but every distinct text is analysed once.
+
+    Term counts are weighted by how often each text occurs, so the
+    max_features selection and the IDF see the full corpus.
+    Returns the matrix and the fitted VocabularyTfidf.
+    """
+    counter = CountVectorizer(ngram_range=ngram_range, dtype=np.float64)
+    counts = counter.fit_transform(uniques)
+    terms = encode_terms(counter.get_feature_names_out())
+
+    if max_features is not None and counts.shape[1] > max_features:
+        # mirrors CountVectorizer._limit_features, with tfs over all rows
+        multiplicity = np.bincount(ids, minlength=len(uniques)).astype(np.float64)
+        tfs = counts.T @ multiplicity
+        keep = np.sort((-tfs).argsort()[:max_features])
+        counts = counts[:, keep]
+        terms = terms[keep]
+
+    transformer = TfidfTransformer()
+    vectors = transformer.fit_transform(counts[ids])
+    return vectors, VocabularyTfidf(terms, transformer.idf_, ngram_range)
+
+
+def vectorizer_path(output: Path) -> Path:
+    """
+    The fitted transform is saved inside an embedding store, or next to
+    a .pkl output as <name>.tfidf/.
+    """
+    return output.with_suffix(".tfidf") if output.suffix == ".pkl" else output
+
+
 @embedding_app.command()
 def tfidf(
-    csv_path: Path = typer.Option(..., help="Path to cleaned CSV file"),
+    csv_path: Path = typer.Option(..., help="Path to cleaned CSV / Parquet / Arrow file"),
     text_col: str = typer.Option(..., help="Text column name"),
     label_col: str = typer.Option(..., help="Label column name"),
     max_features: int = typer.Option(5000, help="Maximum TF-IDF features"),
     ngram_min: int = typer.Option(1, help="Minimum n-gram size"),
     ngram_max: int = typer.Option(1, help="Maximum n-gram size"),
-    output: Path = typer.Option(..., help="Output pickle file path"),
+    output: Path = typer.Option(..., help="Output store path (.emb), or a .pkl file"),
+    chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, help="Rows read per chunk"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Input format: csv, parquet or arrow (default: from suffix)"),
+    dedup: bool = typer.Option(True, "--dedup/--no-dedup", help="Analyse each distinct text once and scatter results back"),
+    dtype: Optional[str] = typer.Option(None, "--dtype", help="Stored values: float32, float16 or int8 with per-feature scales (default: float64)"),
+    hashing: bool = typer.Option(False, "--hashing", help="Streaming mode: hashed features, two passes over the input, nothing held in memory"),
+    n_features: int = typer.Option(DEFAULT_N_FEATURES, help="Number of hashed features (--hashing only)"),
 ):
     """
     Generate TF-IDF embeddings from text data.
     """
 
-    df = pd.read_csv(csv_path)
-    texts = df[text_col].astype(str).tolist()
-    labels = df[label_col].values
+    output = resolve_output(output)
+    if dtype is not None:
+        check_dtype(dtype, output)
+
+    if hashing:
+        if output.suffix == ".pkl" or dtype == "int8":
+            raise typer.BadParameter("--hashing writes a float embedding store (.emb)")
+        hashing_tfidf(csv_path, text_col, label_col, (ngram_min, ngram_max), n_features, output, chunksize, fmt, dtype)
+        return
+
+    labels = []
+    text_index = TextIndex()
+    # flags of `text preprocess`, kept with the features for predict
+    cleaning = load_cleaning(csv_path)
 
+    def texts():
+        # fit_transform consumes documents in a single pass, so the raw
+        # texts never have to be held in memory all at once
+        for chunk in iter_batches(csv_path, [text_col, label_col], chunksize, fmt=fmt):
+            labels.append(chunk[label_col].to_numpy())
+            yield from chunk[text_col].astype(str)
 
-    vectorizer = TfidfVectorizer(
-        max_features=max_features,
-        ngram_range=(ngram_min, ngram_max),
-    )
-    vectors = vectorizer.fit_transform(texts)
+
+    if dedup:
+        ids = []
+        for chunk in iter_batches(csv_path, [text_col, label_col], chunksize, fmt=fmt):
+            labels.append(chunk[label_col].to_numpy())
+            ids.append(text_index.add(chunk[text_col].astype(str)))
+
+        vectors, fitted = fit_tfidf_unique(
+            text_index.uniques,
+            np.concatenate(ids),
+            max_features,
+            (ngram_min, ngram_max),
+        )
+    else:
+        vectorizer = TfidfVectorizer(
+            max_features=max_features,
+            ngram_range=(ngram_min, ngram_max),
+        )
+        vectors = vectorizer.fit_transform(texts())
+        fitted = VocabularyTfidf.from_vectorizer(vectorizer)
+    labels = np.concatenate(labels)
 
     memory_mb = (
         vectors.data.nbytes +
@@ -42,16 +148,27 @@ def tfidf(
         vectors.indices.nbytes
     ) / (1024 ** 2)
 
-    if output.parent == Path("."):
-        output = DEFAULT_EMBEDDINGS_DIR / output
-
-    if output.suffix != ".pkl":
-        output = output.with_suffix(".pkl")
-
-    output.parent.mkdir(parents=True, exist_ok=True)
-    with open(output, "wb") as f:
-        pickle.dump({"X": vectors,"y": labels},f
+    if output.suffix == ".pkl":
+        if dtype == "float16":
+            # scipy sparse has no float16: keep the rounding in float32 values,
+            # as a float16 store is read back
+            vectors = vectors.astype(np.float32)
+            vectors.data = vectors.data.astype(np.float16).astype(np.float32)
+        elif dtype is not None:
+            vectors = vectors.astype(dtype)
+        with open(output, "wb") as f:
+            pickle.dump({"X": vectors,"y": labels},f
 )
+        if cleaning:
+            save_cleaning(output, cleaning)
+    else:
+        save_embeddings(output, vectors, labels, meta={
+            "method": "tfidf",
+            "max_features": max_features,
+            "ngram_range": [ngram_min, ngram_max],
+            "cleaning": cleaning,
+        }, dtype=dtype)
+    fitted.save(vectorizer_path(output))
 
 
     typer.echo("\nTF-IDF Embedding Created Successfully")
@@ -60,66 +177,222 @@ def tfidf(
     typer.echo(f"Max Features   : {vectors.shape[1]}")
     typer.echo(f"N-gram Range   : ({ngram_min}, {ngram_max})")
     typer.echo(f"Shape          : {vectors.shape}")
+    if dedup:
+        typer.echo(f"Duplicates     : {text_index.duplicates} ({text_index.duplicates / max(vectors.shape[0], 1):.1%})")
     typer.echo(f"Memory Usage   : {memory_mb:.2f} MB")
+    if output.suffix != ".pkl":
+        typer.echo(f"Stored Size    : {store_size_mb(output):.2f} MB ({dtype or vectors.dtype.name})")
+    typer.echo(f"Vectorizer     : {vectorizer_path(output)}")
     typer.echo(f"Saved To       : {output}\n")
 
 
 
+def hashing_tfidf(csv_path, text_col, label_col, ngram_range, n_features, output, chunksize, fmt, dtype):
+    """
+    Out-of-core TF-IDF: the first pass over the chunks counts document
+    frequencies, the second applies IDF and appends CSR rows to the store.
+    The IDF vector is saved with the store to transform new data later.
+    """
+    tfidf = HashingTfidf(n_features, ngram_range)
+    columns = [text_col, label_col]
+
+    for chunk in iter_batches(csv_path, columns, chunksize, fmt=fmt):
+        tfidf.partial_fit(chunk[text_col].astype(str))
+
+    meta = {"method": "tfidf-hashing", "n_features": n_features, "ngram_range": list(ngram_range), "cleaning": load_cleaning(csv_path)}
+    with SparseEmbeddingWriter(output, n_features, dtype=dtype or np.float64, meta=meta) as writer:
+        for chunk in iter_batches(csv_path, columns, chunksize, fmt=fmt):
+            writer.append(tfidf.transform(chunk[text_col].astype(str)), chunk[label_col].to_numpy())
+    tfidf.save(output)
+
+    typer.echo("\nTF-IDF Embedding Created Successfully (hashing)")
+    typer.echo("-----------------------------------")
+    typer.echo(f"Documents      : {writer.rows}")
+    typer.echo(f"Features       : {n_features} hashed, {int((tfidf.df > 0).sum())} used")
+    typer.echo(f"N-gram Range   : {ngram_range}")
+    typer.echo(f"Non-zeros      : {writer.nnz}")
+    typer.echo(f"Stored Size    : {store_size_mb(output):.2f} MB ({writer.dtype.name})")
+    typer.echo(f"Saved To       : {output}\n")
+
+
+@embedding_app.command("tfidf-transform")
+def tfidf_transform(
+    csv_path: Path = typer.Option(..., help="Path to cleaned CSV / Parquet / Arrow file"),
+    text_col: str = typer.Option(..., help="Text column name"),
+    vectorizer: Path = typer.Option(..., help="TF-IDF store (or .tfidf directory) written by 'embd tfidf'"),
+    output: Path = typer.Option(..., help="Output store path (.emb)"),
+    label_col: Optional[str] = typer.Option(None, help="Label column name, if the data has one"),
+    chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, help="Rows read and transformed per chunk"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Input format: csv, parquet or arrow (default: from suffix)"),
+    workers: int = typer.Option(1, help="Processes transforming chunks in parallel"),
+    dtype: Optional[str] = typer.Option(None, "--dtype", help="Stored values: float32 or float16 (default: float64)"),
+):
+    """
+    Transform new data with a saved TF-IDF vectorizer, without refitting.
+    """
+
+    output = resolve_output(output).with_suffix(STORE_SUFFIX)
+    if dtype is not None:
+        check_dtype(dtype, output)
+        if dtype == "int8":
+            raise typer.BadParameter("tfidf-transform writes float values; use float32 or float16")
+
+    columns = [text_col] + ([label_col] if label_col else [])
+
+    def items():
+        for chunk in iter_batches(csv_path, columns, chunksize, fmt=fmt):
+            labels = chunk[label_col].to_numpy() if label_col else np.full(len(chunk), "")
+            yield chunk[text_col].astype(str).tolist(), labels
+
+    n_features = load_tfidf(vectorizer).n_features
+
+    meta = {"method": "tfidf-transform", "vectorizer": str(vectorizer), "cleaning": load_cleaning(csv_path)}
+    with SparseEmbeddingWriter(output, n_features, dtype=dtype or np.float64, meta=meta) as writer:
+        for X, labels in iter_transform(vectorizer, items(), workers):
+            writer.append(X, labels)
+
+    typer.echo("\nTF-IDF Transform Done")
+    typer.echo("-----------------------------------")
+    typer.echo(f"Documents      : {writer.rows}")
+    typer.echo(f"Features       : {n_features}")
+    typer.echo(f"Non-zeros      : {writer.nnz}")
+    typer.echo(f"Stored Size    : {store_size_mb(output):.2f} MB ({writer.dtype.name})")
+    typer.echo(f"Saved To       : {output}\n")
+
+
 @embedding_app.command()
 def model2vec(
-    csv_path: Path = typer.Option(..., help="Path to cleaned CSV file"),
+    csv_path: Path = typer.Option(..., help="Path to cleaned CSV / Parquet / Arrow file"),
     text_col: str = typer.Option(..., help="Text column name"),
     label_col: str = typer.Option(..., help="Label column name"),
     output: Path = typer.Option(
         ...,
-        help="Output file name or path (.pkl will be added automatically)",
+        help="Output file name or path (.emb store by default, or .pkl)",
     ),
-    batch_size: int = typer.Option(32, help="Batch size for embedding"),
+    batch_size: int = typer.Option(32, help="Rows per encoding batch"),
+    max_tokens_per_batch: int = typer.Option(16384, help="Token budget per batch for models that pad (transformers under sentence-transformers), rows grouped by length; 0: no budget"),
+    chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, help="Rows read and encoded per chunk"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Input format: csv, parquet or arrow (default: from suffix)"),
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse vectors of texts encoded in earlier runs"),
+    cache_path: Path = typer.Option(DEFAULT_CACHE_PATH, help="SQLite embedding cache file"),
+    cache_max_mb: float = typer.Option(1024, help="Cache size limit; least recently used vectors are evicted"),
+    dedup: bool = typer.Option(True, "--dedup/--no-dedup", help="Encode each distinct text once and scatter vectors back (keeps one vector per distinct text in memory)"),
+    model_name: str = typer.Option(DEFAULT_MODEL2VEC_MODEL, "--model", help="Hugging Face model id or local model directory"),
+    engine: str = typer.Option("native", help="Encoder: native (NumPy, no torch) or sentence-transformers"),
+    workers: int = typer.Option(1, help="Encoding processes; vectors are written to shared memory"),
+    dtype: str = typer.Option("float32", "--dtype", help="Stored vectors: float32, float16 or int8 with per-dimension scales"),
 ):
     """
     Generate Model2Vec embeddings (static sentence embeddings).
     """
 
-    df = pd.read_csv(csv_path)
-    texts = df[text_col].astype(str).tolist()
-    labels = df[label_col].values
 
+    output = resolve_output(output)
+    check_dtype(dtype, output)
+    cleaning = load_cleaning(csv_path)
 
-    if output.parent == Path("."):
-        output = DEFAULT_EMBEDDINGS_DIR / output
+    try:
+        model = load_sentence_encoder(
+            model_name, engine, batch_size=batch_size, max_tokens=max_tokens_per_batch, workers=workers
+        )
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
 
-    if output.suffix != ".pkl":
-        output = output.with_suffix(".pkl")
+    embedding_cache = None
+    try:
+        if cache:
+            embedding_cache = EmbeddingCache(
+                cache_path,
+                model_name=model_name,
+                normalized=True,
+                engine=engine,
+                revision=model_revision(model_name),
+                max_mb=cache_max_mb,
+            )
 
-    output.parent.mkdir(parents=True, exist_ok=True)
+        def cached_encode(texts):
+            if embedding_cache is None:
+                return model.encode(texts)
+            return embedding_cache.encode(texts, model.encode)
 
-    model_name = "JadwalAlmaa/model2vec-ARBERTv2"
-    model = SentenceTransformer(model_name)
-
-    embeddings = model.encode(
-        texts,
-        batch_size=batch_size,
-        show_progress_bar=True,
-        convert_to_numpy=True,
-        normalize_embeddings=True,
-    )
-
-    memory_mb = embeddings.nbytes / (1024 ** 2)
-
-    with open(output, "wb") as f:
-        pickle.dump(
-    {
-        "X": embeddings,
-        "y": labels
-    },
-    f
-)
+        rows = 0
+        text_index = TextIndex()
+        # one vector per distinct text seen so far, indexed by its TextIndex id
+        known = np.empty((0, model.dim), dtype=np.float32)
+
+        def encode(texts):
+            nonlocal rows, known
+            rows += len(texts)
+            if not dedup:
+                return cached_encode(texts)
+
+            n_known = len(text_index.ids)
+            ids = text_index.add(texts)
+            new_ids, first = np.unique(ids, return_index=True)
+            first = first[new_ids >= n_known]
+            if len(first):
+                vectors = cached_encode([texts[i] for i in first])
+                if len(known) < len(text_index.ids):
+                    grown = np.empty((max(2 * len(known), len(text_index.ids)), vectors.shape[1]), dtype=np.float32)
+                    grown[:n_known] = known[:n_known]
+                    known = grown
+                known[n_known:len(text_index.ids)] = vectors
+            return known[ids]
+
+        chunks = iter_batches(csv_path, [text_col, label_col], chunksize, fmt=fmt)
+
+        if output.suffix == ".pkl":
+            embeddings, labels = [], []
+            for chunk in chunks:
+                embeddings.append(encode(chunk[text_col].astype(str).tolist()))
+                labels.append(chunk[label_col].to_numpy())
+
+            embeddings = np.vstack(embeddings).astype(dtype, copy=False)
+            labels = np.concatenate(labels)
+
+            with open(output, "wb") as f:
+                pickle.dump({"X": embeddings, "y": labels}, f)
+            if cleaning:
+                save_cleaning(output, cleaning)
+
+            shape = embeddings.shape
+            memory_mb = embeddings.nbytes / (1024 ** 2)
+
+        else:
+            # each encoded chunk goes straight to disk
+            meta = {
+                "method": "model2vec", "model": model_name, "engine": engine, "normalized": True,
+                "cleaning": cleaning,
+            }
+            with EmbeddingWriter(output, dtype=dtype, meta=meta) as writer:
+                for chunk in chunks:
+                    writer.append(encode(chunk[text_col].astype(str).tolist()), chunk[label_col].to_numpy())
+
+            shape = (writer.rows, writer.dim or 0)
+            memory_mb = shape[0] * shape[1] * writer.dtype.itemsize / (1024 ** 2)
 
 
-    typer.echo("\nModel2Vec Embedding Created Successfully")
-    typer.echo("---------------------------------------")
-    typer.echo(f"Documents    : {embeddings.shape[0]}")
-    typer.echo(f"Vector Size  : {embeddings.shape[1]}")
-    typer.echo(f"Shape        : {embeddings.shape}")
-    typer.echo(f"Memory Usage : {memory_mb:.2f} MB")
-    typer.echo(f"Saved To     : {output}\n")
+        typer.echo("\nModel2Vec Embedding Created Successfully")
+        typer.echo("---------------------------------------")
+        typer.echo(f"Documents    : {shape[0]}")
+        typer.echo(f"Vector Size  : {shape[1]}")
+        typer.echo(f"Shape        : {shape}")
+        if dedup:
+            typer.echo(f"Duplicates   : {text_index.duplicates} ({text_index.duplicates / max(rows, 1):.1%})")
+        typer.echo(f"Memory Usage : {memory_mb:.2f} MB ({dtype})")
+        real, fixed_padded, scheduled_padded = model.padding
+        if real:
+            typer.echo(
+                f"Padding Eff. : {real / fixed_padded:.1%} with {batch_size}-row batches in file order, "
+                f"{real / scheduled_padded:.1%} as scheduled"
+            )
+        if embedding_cache is not None:
+            typer.echo(
+                f"Cache        : {embedding_cache.hits} hits / {embedding_cache.misses} misses "
+                f"({embedding_cache.hit_rate():.1%}), {embedding_cache.evicted} evicted"
+            )
+        typer.echo(f"Saved To     : {output}\n")
+    finally:
+        if embedding_cache is not None:
+            embedding_cache.close()
+        model.close()
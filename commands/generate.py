@@ -1,5 +1,8 @@
+import asyncio
 import typer
-from utils.data_handler import generate_classification_csv_gemini
+from pathlib import Path
+from typing import Optional
+from utils.generation import GeminiClient, StubClient, SyntheticDataGenerator
 import pandas as pd
 generate_app = typer.Typer(help="Data generation commands" , invoke_without_command=True)
 
@@ -9,24 +12,49 @@ def generate(
     topic: str = typer.Option("customer reviews",help="Subject/domain of the generated texts"),
     count: int = typer.Option(..., help="Number of rows to generate"),
     classes: list[str] = typer.Option(...,"--class", help="Repeat this option to add multiple classes. Example: --class positive --class negative"),
-    api_key: str = typer.Option(..., help="Your Gemini API key (free tier)"),
+    api_key: Optional[str] = typer.Option(None, help="Your Gemini API key (free tier)"),
     preview: int = typer.Option(5,"--head",help="Show N sample rows after generation",),
+    output: str = typer.Option("outputs/data/synthetic.csv", help="Output CSV; rows are appended as they arrive"),
+    batch_size: int = typer.Option(25, help="Rows asked for per request (each request is for one class)"),
+    concurrency: int = typer.Option(4, help="Requests in flight at the same time"),
+    rate_per_minute: float = typer.Option(60, help="Requests started per minute at most; 0 for no limit"),
+    max_retries: int = typer.Option(5, help="Retries per request, with exponential backoff"),
+    restart: bool = typer.Option(False, "--restart", help="Ignore the checkpoint of an interrupted run and start over, overwriting --output"),
+    stub: bool = typer.Option(False, "--stub", help="Use an offline stub client with placeholder texts instead of Gemini"),
 ):
     """
     Generate synthetic Arabic classification data using Gemini.
-    Output is saved automatically to outputs/output_data/synthetic.csv
+    Rows are appended to --output (default outputs/data/synthetic.csv);
+    an interrupted run resumes from its checkpoint.
     """
-    if not api_key:
+    if stub:
+        client = StubClient()
+    elif not api_key:
         raise ValueError("Please provide your own Gemini API key (free tier).")
-    
+    else:
+        client = GeminiClient(api_key)
 
-    generate_classification_csv_gemini(
-        topic=topic,
-        num_rows=count,
-        classes=classes,
-        api_key=api_key,
-    )
-    print("✅ Synthetic data generated successfully.")
-    df = pd.read_csv(r"C:\Users\HP\Desktop\SDAIA_BOOTCAMP5\nlp-cli-tool\outputs\data\synthetic.csv")
-    print("\n📊 Sample (first 5 rows):")
-    print(df.head(preview))
\ No newline at end of file
+    try:
+        generator = SyntheticDataGenerator(
+            client, topic, classes, count, output,
+            batch_size=batch_size, concurrency=concurrency, rate_per_minute=rate_per_minute,
+            max_retries=max_retries, restart=restart,
+        )
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    summary = asyncio.run(generator.run())
+
+    if summary["missing"]:
+        print(f"⚠️ Incomplete, rows still missing: {summary['missing']}. Run again to resume.")
+    else:
+        print("✅ Synthetic data generated successfully.")
+    print(f"Rows per class : {summary['rows']}")
+    print(f"Requests       : {summary['requests']} ({summary['retries']} retries, {summary['failed_requests']} failed)")
+    print(f"Invalid rows   : {summary['invalid_rows']}")
+
+    if not Path(output).exists():
+        return
+    df = pd.read_csv(output)
+    print(f"\n📊 Sample (first {preview} rows):")
+    print(df.head(preview))
@@ -0,0 +1,226 @@
+import pickle
+from pathlib import Path
+
+import pandas as pd
+import typer
+from scipy import sparse
+
+from commands.embedding import DEFAULT_MODEL2VEC_MODEL, fit_tfidf_unique, vectorizer_path
+from commands.training import fit_models, parse_models, write_training_report
+from utils.data_handler import (
+    CLEANING_FLAGS, TableWriter, TextIndex, clean_text_column, load_cleaning, load_groups, read_table, reduce_sparse,
+    save_cleaning, split_data,
+)
+from utils.embedding_store import load_embeddings, save_embeddings
+from utils.featurizer import feature_config, save_feature_config
+from utils.pipeline import STATE_DIR, PipelineState, load_pipeline, run_pipeline
+from utils.sentence_encoder import load_sentence_encoder
+
+pipeline_app = typer.Typer(help="Run preprocess -> embed -> train as one cached pipeline")
+
+
+class CleanStage:
+    """
+    input (or the upstream table) -> cleaned table, written to output.
+    Params: input, output, text_col, remove, replace_light,
+    replace_aggressive, stopwords, workers.
+    """
+
+    def run(self, params: dict, inputs: list) -> dict:
+        df = inputs[0]["table"].copy() if inputs else read_table(params["input"])
+        df = clean_text_column(
+            df,
+            params.get("text_col", "text"),
+            remove=params.get("remove", False),
+            replace_light=params.get("replace_light", False),
+            replace_aggressive=params.get("replace_aggressive", False),
+            stopwords=params.get("stopwords", False),
+            workers=params.get("workers", 1),
+        )
+        Path(params["output"]).parent.mkdir(parents=True, exist_ok=True)
+        with TableWriter(params["output"]) as writer:
+            writer.write(df)
+        cleaning = {flag: params.get(flag, False) for flag in CLEANING_FLAGS}
+        save_cleaning(params["output"], cleaning)
+        return {"table": df, "path": params["output"], "cleaning": cleaning}
+
+    def load(self, params: dict) -> dict:
+        return {"table": read_table(params["output"]), "path": params["output"], "cleaning": load_cleaning(params["output"])}
+
+
+def _stage_table(params: dict, inputs: list) -> pd.DataFrame:
+    if inputs:
+        return inputs[0]["table"]
+    return read_table(params["input"], [params.get("text_col", "text"), params.get("label_col", "label")])
+
+
+def _stage_cleaning(params: dict, inputs: list) -> dict | None:
+    """
+    Cleaning flags of the stage's texts, stored in the embedding meta.
+    """
+    if inputs:
+        return inputs[0].get("cleaning")
+    return load_cleaning(params["input"])
+
+
+class Model2VecStage:
+    """
+    table -> Model2Vec embedding store at output.
+    Params: input (without an upstream stage), output, text_col,
+    label_col, model, engine, batch_size, max_tokens_per_batch, workers,
+    dtype.
+    """
+
+    def run(self, params: dict, inputs: list) -> dict:
+        df = _stage_table(params, inputs)
+        model_name = params.get("model", DEFAULT_MODEL2VEC_MODEL)
+        engine = params.get("engine", "native")
+        dtype = params.get("dtype", "float32")
+
+        encoder = load_sentence_encoder(
+            model_name,
+            engine,
+            batch_size=params.get("batch_size", 32),
+            max_tokens=params.get("max_tokens_per_batch", 16384),
+            workers=params.get("workers", 1),
+        )
+        # each distinct text is encoded once
+        ids, uniques = pd.factorize(df[params.get("text_col", "text")].astype(str))
+        X = encoder.encode(list(uniques))[ids]
+        encoder.close()
+        y = df[params.get("label_col", "label")].to_numpy()
+
+        meta = {
+            "method": "model2vec", "model": model_name, "engine": engine, "normalized": True,
+            "cleaning": _stage_cleaning(params, inputs),
+        }
+        save_embeddings(params["output"], X, y, meta=meta, dtype=dtype)
+        if dtype != "float32":
+            # hand on the stored (rounded) values, as a later load would
+            return self.load(params)
+        return {"X": X, "y": y, "path": params["output"]}
+
+    def load(self, params: dict) -> dict:
+        X, y, _ = load_embeddings(params["output"])
+        return {"X": X, "y": y, "path": params["output"]}
+
+
+class TfidfStage:
+    """
+    table -> TF-IDF embedding store at output, with its vectorizer.
+    Params: input (without an upstream stage), output, text_col,
+    label_col, max_features, ngram_min, ngram_max, dtype.
+    """
+
+    def run(self, params: dict, inputs: list) -> dict:
+        df = _stage_table(params, inputs)
+        ngram_range = (params.get("ngram_min", 1), params.get("ngram_max", 1))
+
+        text_index = TextIndex()
+        ids = text_index.add(df[params.get("text_col", "text")].astype(str))
+        X, fitted = fit_tfidf_unique(text_index.uniques, ids, params.get("max_features", 5000), ngram_range)
+        y = df[params.get("label_col", "label")].to_numpy()
+
+        output = Path(params["output"])
+        meta = {
+            "method": "tfidf", "max_features": params.get("max_features", 5000), "ngram_range": list(ngram_range),
+            "cleaning": _stage_cleaning(params, inputs),
+        }
+        save_embeddings(output, X, y, meta=meta, dtype=params.get("dtype"))
+        fitted.save(vectorizer_path(output))
+        if params.get("dtype"):
+            return self.load(params)
+        return {"X": X, "y": y, "path": str(output)}
+
+    def load(self, params: dict) -> dict:
+        X, y, _ = load_embeddings(params["output"])
+        return {"X": X, "y": y, "path": params["output"]}
+
+
+class TrainStage:
+    """
+    features -> trained models, report, and the best model at save_model.
+    Params: models, test_size, svd_components, max_dense_gb, jobs,
+    save_model, groups (table with a group id per row), group_col.
+    """
+
+    def run(self, params: dict, inputs: list) -> dict:
+        if not inputs:
+            X, y, _ = load_embeddings(params["input"])
+            data_path = params["input"]
+        else:
+            X, y, data_path = inputs[0]["X"], inputs[0]["y"], inputs[0]["path"]
+
+        test_size = params.get("test_size", 0.2)
+        groups = None
+        if params.get("groups"):
+            groups = load_groups(params["groups"], params.get("group_col", "group"), X.shape[0])
+        X_train, X_test, y_train, y_test = split_data(X, y, test_size, groups)
+
+        svd = None
+        if params.get("svd_components") and sparse.issparse(X_train):
+            X_train, X_test, svd = reduce_sparse(X_train, X_test, params["svd_components"])
+
+        models = params.get("models", ["all"])
+        models = [models] if isinstance(models, str) else models
+        results, trained_models = fit_models(
+            parse_models(models), X_train, X_test, y_train, y_test,
+            params.get("max_dense_gb", 4.0), params.get("jobs", 1),
+        )
+
+        for name, m in results.items():
+            typer.echo(f"  {name:<10} accuracy {m['accuracy']:.3f}  f1 {m['f1']:.3f}  fit {m['fit_seconds']:.2f} s")
+
+        if params.get("save_model"):
+            best = max(results, key=lambda k: results[k]["f1"])
+            model_path = Path(params["save_model"])
+            model_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(model_path, "wb") as f:
+                pickle.dump(trained_models[best], f)
+            save_feature_config(model_path, feature_config(data_path), svd)
+            typer.echo(f"  best model {best} saved to {model_path}")
+
+        report_file = write_training_report(results, X.shape[0], X.shape[1], test_size)
+        typer.echo(f"  report: {report_file}")
+        return {"results": results}
+
+    def load(self, params: dict) -> dict:
+        return {}
+
+
+STAGE_TYPES = {
+    "clean": CleanStage(),
+    "model2vec": Model2VecStage(),
+    "tfidf": TfidfStage(),
+    "train": TrainStage(),
+}
+
+
+@pipeline_app.command()
+def run(
+    config: Path = typer.Argument(..., help="Pipeline YAML file"),
+    force: bool = typer.Option(False, "--force", help="Run every stage, even if up to date"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only show which stages would run"),
+):
+    """
+    Run the pipeline's stages in dependency order, skipping stages whose
+    inputs and parameters did not change since their last run.
+    """
+    try:
+        stages, order = load_pipeline(config)
+    except (ValueError, OSError) as e:
+        raise typer.BadParameter(str(e))
+
+    state = PipelineState(STATE_DIR / f"{config.stem}.state.json")
+    try:
+        summary = run_pipeline(stages, order, STAGE_TYPES, state, force=force, dry_run=dry_run, echo=typer.echo)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    ran = [name for name, status, _ in summary if status == "ran"]
+    typer.echo("\nPipeline Done")
+    typer.echo("-----------------------------------")
+    for name, status, seconds in summary:
+        typer.echo(f"{name:<15}: {status}" + (f" ({seconds:.2f} s)" if status == "ran" else ""))
+    typer.echo(f"Stages run     : {len(ran)} of {len(summary)}")
+    typer.echo(f"State          : {state.path}\n")
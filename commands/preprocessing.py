@@ -1,49 +1,202 @@
-import pandas as pd
 import typer
-from utils.data_handler import clean_text_column, text_stats
+from typing import Optional
+from utils.data_handler import (
+    DEFAULT_CHUNKSIZE,
+    TABLE_FORMATS,
+    TableWriter,
+    detect_format,
+    iter_batches,
+    iter_clean_chunks,
+    merge_text_stats,
+    output_name,
+    save_cleaning,
+    table_columns,
+    text_stats,
+)
 from pathlib import Path
+import time
+import numpy as np
 preprocess_app = typer.Typer()
 OUTPUT_DIR = Path("outputs/data")
 @preprocess_app.command()
 
 def preprocess(
-    csv_path: str = typer.Option(..., "--csv-path", help="Path to input CSV"),
+    csv_path: str = typer.Option(..., "--csv-path", help="Path to input CSV / Parquet / Arrow file"),
     text_col: str = typer.Option(..., "--text-col", help="Text column to clean"),
     output: str = typer.Option("cleaned.csv", "--output", help="Output file name"),
     remove: bool = typer.Option(False, "--remove"),
     replace_light: bool = typer.Option(False, "--replace-light"),
     replace_aggressive: bool = typer.Option(False, "--replace-aggressive"),
     stopwords: bool = typer.Option(False, "--stopwords"),
+    batch: bool = typer.Option(True, "--batch/--per-row", help="Clean with the compiled pipeline or the reference function row by row"),
+    workers: int = typer.Option(1, "--workers", help="Number of worker processes for cleaning"),
+    chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, "--chunksize", help="Rows read and cleaned per chunk"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Output format: csv, parquet or arrow (default: from output suffix, else csv)"),
 ):
-    df = pd.read_csv(csv_path)
+    try:
+        columns = table_columns(csv_path)
+        if fmt is None:
+            fmt = TABLE_FORMATS.get(Path(output).suffix.lower(), "csv")
+        fmt = detect_format(output, fmt)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
 
-    if text_col not in df.columns:
+    if text_col not in columns:
         raise typer.BadParameter(f"Column '{text_col}' not found in CSV")
 
     # عشان لو ما حط اسم الصيغه  يعني 
-    if not output.lower().endswith(".csv"):
-        output += ".csv"
+    output = output_name(output, fmt)
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     output_path = OUTPUT_DIR / output
 
-    before = text_stats(df[text_col])
+    before, after = [], []
 
-    df = clean_text_column(
-        df,
+    def raw_chunks():
+        for chunk in iter_batches(csv_path, chunksize=chunksize):
+            before.append(text_stats(chunk[text_col]))
+            yield chunk
+
+    cleaned = iter_clean_chunks(
+        raw_chunks(),
         text_col=text_col,
         remove=remove,
         replace_light=replace_light,
         replace_aggressive=replace_aggressive,
         stopwords=stopwords,
+        batch=batch,
+        workers=workers,
     )
 
-    after = text_stats(df[text_col])
+    with TableWriter(output_path, fmt, columns) as writer:
+        for chunk in cleaned:
+            after.append(text_stats(chunk[text_col]))
+            writer.write(chunk)
+
+    save_cleaning(output_path, {
+        "remove": remove,
+        "replace_light": replace_light,
+        "replace_aggressive": replace_aggressive,
+        "stopwords": stopwords,
+    })
 
-    df.to_csv(output_path, index=False)
+    before = merge_text_stats(before)
+    after = merge_text_stats(after)
 
     typer.echo(" Cleaning completed")
     typer.echo(f" Rows: {before['rows']}")
     typer.echo(f" Avg chars: {before['avg_chars']:.2f} → {after['avg_chars']:.2f}")
     typer.echo(f" Total words: {before['total_words']} → {after['total_words']}")
+
+
+@preprocess_app.command()
+def dedup(
+    csv_path: str = typer.Option(..., "--csv-path", help="Path to input CSV / Parquet / Arrow file (cleaned text)"),
+    text_col: str = typer.Option(..., "--text-col", help="Text column to compare"),
+    output: str = typer.Option("deduped.csv", "--output", help="Output file name"),
+    mode: str = typer.Option("drop", "--mode", help="drop: keep the first row of each near-duplicate cluster; group: keep all rows and add a group id column"),
+    group_col: str = typer.Option("group", "--group-col", help="Group id column written in group mode"),
+    shingle: str = typer.Option("char", "--shingle", help="Shingles of characters (char) or words (word)"),
+    ngram: Optional[int] = typer.Option(None, "--ngram", help="Shingle length (default: 5 characters or 3 words)"),
+    threshold: float = typer.Option(0.8, "--threshold", help="Jaccard similarity from which texts count as near duplicates"),
+    num_perm: int = typer.Option(128, "--num-perm", help="MinHash permutations per text"),
+    bands: Optional[int] = typer.Option(None, "--bands", help="LSH bands (default: chosen from --threshold)"),
+    seed: int = typer.Option(0, "--seed", help="Seed of the MinHash permutations"),
+    chunksize: int = typer.Option(DEFAULT_CHUNKSIZE, "--chunksize", help="Rows read and hashed per chunk"),
+    workers: int = typer.Option(1, "--workers", help="Number of worker processes for hashing"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Output format: csv, parquet or arrow (default: from output suffix, else csv)"),
+):
+    """
+    Find near-duplicate texts with MinHash LSH and drop or group them.
+
+    Rows are streamed twice: once to hash them (only the LSH band keys,
+    bands x 8 bytes per row, stay in memory) and once to write the output.
+    Texts whose signatures collide in any band are linked, and the
+    connected components are the clusters.
+    """
+    from utils.dedup import SHINGLE_MODES, cluster_stats, iter_band_keys, lsh_clusters, lsh_params
+
+    if mode not in ("drop", "group"):
+        raise typer.BadParameter("--mode must be drop or group")
+    if shingle not in SHINGLE_MODES:
+        raise typer.BadParameter(f"--shingle must be one of {', '.join(SHINGLE_MODES)}")
+    if ngram is None:
+        ngram = 5 if shingle == "char" else 3
+
+    try:
+        columns = table_columns(csv_path)
+        if fmt is None:
+            fmt = TABLE_FORMATS.get(Path(output).suffix.lower(), "csv")
+        fmt = detect_format(output, fmt)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    if bands is None:
+        bands, band_rows = lsh_params(threshold, num_perm)
+    elif 1 <= bands <= num_perm:
+        band_rows = num_perm // bands
+    else:
+        raise typer.BadParameter("--bands must be between 1 and --num-perm")
+
+    if text_col not in columns:
+        raise typer.BadParameter(f"Column '{text_col}' not found in CSV")
+
+    output = output_name(output, fmt)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = OUTPUT_DIR / output
+
+    start = time.perf_counter()
+    text_chunks = (
+        chunk[text_col].fillna("").astype(str).tolist()
+        for chunk in iter_batches(csv_path, [text_col], chunksize=chunksize)
+    )
+    keys = list(iter_band_keys(text_chunks, shingle, ngram, num_perm, bands, seed, workers, band_rows))
+    hash_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keys = np.concatenate(keys) if keys else np.empty((0, bands), dtype=np.uint64)
+    clusters = lsh_clusters(keys)
+    stats = cluster_stats(clusters)
+    cluster_seconds = time.perf_counter() - start
+
+    # first row of each cluster is the one kept
+    keep = np.zeros(len(clusters), dtype=bool)
+    keep[np.unique(clusters, return_index=True)[1]] = True
+    largest = int(np.bincount(clusters).argmax()) if len(clusters) else -1
+    examples = []
+
+    start = time.perf_counter()
+    out_columns = columns + [group_col] if mode == "group" else columns
+    offset = 0
+    with TableWriter(output_path, fmt, out_columns) as writer:
+        for chunk in iter_batches(csv_path, chunksize=chunksize):
+            rows = clusters[offset:offset + len(chunk)]
+            if len(examples) < 3:
+                examples += chunk[text_col][rows == largest].astype(str).tolist()[:3 - len(examples)]
+            if mode == "group":
+                chunk[group_col] = rows
+            else:
+                chunk = chunk[keep[offset:offset + len(chunk)]]
+            writer.write(chunk)
+            offset += len(rows)
+    write_seconds = time.perf_counter() - start
+
+    typer.echo(" Deduplication completed")
+    typer.echo(f" Rows: {stats['rows']}")
+    typer.echo(f" LSH: {bands} bands x {band_rows} rows of {num_perm} permutations, {shingle} {ngram}-grams")
+    typer.echo(f" Clusters: {stats['clusters']} ({stats['duplicate_clusters']} with duplicates)")
+    typer.echo(f" Rows in duplicate clusters: {stats['rows_in_duplicate_clusters']}")
+    typer.echo(f" Largest cluster: {stats['largest_cluster']} rows")
+    typer.echo(" Cluster sizes: " + ", ".join(f"{size}: {n}" for size, n in stats["size_histogram"].items()))
+    if stats["largest_cluster"] > 1:
+        for text in examples:
+            typer.echo(f"   e.g. {text[:80]}")
+    if mode == "drop":
+        typer.echo(f" Rows dropped: {stats['removable_rows']}")
+    else:
+        typer.echo(f" Group ids written to column '{group_col}'")
+    rows_per_sec = stats["rows"] / max(hash_seconds, 1e-12)
+    typer.echo(f" Time: hash {hash_seconds:.2f} s ({rows_per_sec:.0f} rows/sec), cluster {cluster_seconds:.2f} s, write {write_seconds:.2f} s")
+    typer.echo(f" Saved to {output_path}")
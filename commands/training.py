@@ -1,33 +1,76 @@
 import typer
 from typing import List, Optional
+import asyncio
+import itertools
+import json
+import os
 import pickle
+import time
 from pathlib import Path
 
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
-
-from utils.data_handler import load_data, split_data
+from sklearn.utils import get_tags
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, StratifiedGroupKFold, StratifiedKFold
+from scipy import sparse
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+import numpy as np
+
+from utils.ann import ANNKNeighborsClassifier
+from utils.arabic_text import CleaningPipeline
+from utils.data_handler import (
+    CLEANING_FLAGS, TableWriter, densify, iter_batches, load_data, load_groups, reduce_sparse, split_indices,
+)
+from utils.embedding_store import is_embedding_store, load_manifest
+from utils.featurizer import Featurizer, feature_config, load_feature_config, save_feature_config
+from utils.inference_server import InferenceServer, InferenceService
 from utils.metrics import compute_classification_metrics
 
 training_app = typer.Typer()
 
-def build_model(name: str, params: dict | None = None):
+def build_model(name: str, params: dict | None = None, n_jobs: int | None = None):
+    """
+    n_jobs is the model's own thread count (KNN, random forest), used
+    unless params set it. knn:backend=ivf|hnsw gives an approximate
+    nearest neighbor KNN; backend=brute (default) is sklearn's.
+    """
     params = params or {}
     name = name.lower()
+    threads = {"n_jobs": n_jobs} if n_jobs and "n_jobs" not in params else {}
 
     if name == "knn":
-        return KNeighborsClassifier(**params)
+        backend = params.get("backend", "brute")
+        if backend == "hnsw":
+            try:
+                import hnswlib  # noqa: F401
+            except ImportError:
+                raise typer.BadParameter("knn:backend=hnsw needs the hnswlib package: pip install hnswlib")
+        if backend != "brute":
+            return ANNKNeighborsClassifier(**params)
+        return KNeighborsClassifier(**threads, **{k: v for k, v in params.items() if k != "backend"})
 
     if name in ["lr", "logistic", "regression"]:
         return LogisticRegression(max_iter=1000, **params)
 
     if name in ["rf", "random", "forest"]:
-        return RandomForestClassifier(**params)
+        return RandomForestClassifier(**threads, **params)
 
     raise ValueError(f"Unsupported model: {name}")
 
 
+def parse_value(v: str):
+    try:
+        return int(v)
+    except ValueError:
+        try:
+            return float(v)
+        except ValueError:
+            return v
+
+
 def parse_models(models: List[str]):
     """
     Returns list of (model_name, params)
@@ -50,14 +93,7 @@ def parse_models(models: List[str]):
             params = {}
             for p in param_str.split(","):
                 k, v = p.split("=")
-                try:
-                    v = int(v)
-                except ValueError:
-                    try:
-                        v = float(v)
-                    except ValueError:
-                        pass
-                params[k] = v
+                params[k] = parse_value(v)
         else:
             name = item
             params = {}
@@ -66,6 +102,40 @@ def parse_models(models: List[str]):
 
     return parsed
 
+DEFAULT_GRIDS = {
+    "knn": {"n_neighbors": [3, 5, 11, 21], "weights": ["uniform", "distance"]},
+    "logistic": {"C": [0.1, 1.0, 10.0]},
+    "forest": {"n_estimators": [100, 300], "max_depth": [None, 20]},
+}
+
+# params that pick the estimator class in build_model, so a search
+# cannot set them on an already built estimator
+CONSTRUCTOR_PARAMS = {"knn": ("backend",)}
+
+
+def parse_grids(models: List[str]):
+    """
+    Like parse_models, but every value may list alternatives:
+    "knn:n_neighbors=3|5|11,weights=uniform|distance".
+    'all' tunes every model on DEFAULT_GRIDS.
+    Returns list of (model_name, {param: [values]})
+    """
+
+    if "all" in models:
+        return list(DEFAULT_GRIDS.items())
+
+    parsed = []
+
+    for item in models:
+        name, _, param_str = item.partition(":")
+        grid = {}
+        for p in filter(None, param_str.split(",")):
+            k, v = p.split("=")
+            grid[k] = [None if x == "None" else parse_value(x) for x in v.split("|")]
+        parsed.append((name, grid))
+
+    return parsed
+
 from datetime import datetime
 
 
@@ -75,6 +145,9 @@ def write_training_report(
     num_features: int,
     test_size: float,
     output_dir: str = "outputs/reports",
+    storage_dtype: str | None = None,
+    reference: dict | None = None,
+    cv_results: dict | None = None,
 ):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     report_path = Path(output_dir)
@@ -90,7 +163,10 @@ def write_training_report(
         f.write("## Dataset Info\n")
         f.write(f"- Total samples: {num_samples}\n")
         f.write(f"- Test size: {int(test_size * 100)}%\n")
-        f.write(f"- Features: {num_features}\n\n")
+        f.write(f"- Features: {num_features}\n")
+        if storage_dtype:
+            f.write(f"- Storage dtype: {storage_dtype}\n")
+        f.write("\n")
 
         f.write("## Model Performance\n\n")
 
@@ -99,40 +175,151 @@ def write_training_report(
             f.write(f"- Accuracy:  {m['accuracy']:.3f}\n")
             f.write(f"- Precision: {m['precision']:.3f}\n")
             f.write(f"- Recall:    {m['recall']:.3f}\n")
-            f.write(f"- F1-score:  {m['f1']:.3f}\n\n")
+            f.write(f"- F1-score:  {m['f1']:.3f}\n")
+            if "queries_per_sec" in m:
+                f.write(f"- Queries/sec: {m['queries_per_sec']:.0f}\n")
+                f.write(f"- Recall@{m['k']} vs exact: {m['recall_at_k']:.3f}\n")
+            if reference and name in reference:
+                delta = m["accuracy"] - reference[name]["accuracy"]
+                f.write(f"- Accuracy delta vs float32: {delta:+.4f}\n")
+            f.write("\n")
 
         f.write(f"## Best Model ⭐\n")
         f.write(f"**{best_model.upper()}**\n")
 
+        if cv_results:
+            f.write("\n## Cross-Validation Results\n")
+            for search, rows in cv_results.items():
+                f.write(f"\n### {search}\n\n")
+                f.write("| Rank | Mean F1 | Std F1 | Params |\n")
+                f.write("|---:|---:|---:|---|\n")
+                for row in sorted(rows, key=lambda r: r["rank"]):
+                    params = ", ".join(f"{k}={v}" for k, v in row["params"].items())
+                    f.write(f"| {row['rank']} | {row['mean_test_score']:.3f} | {row['std_test_score']:.3f} | {params} |\n")
+
     return report_file
 
 
 
+def thread_budget(jobs: int, n_models: int) -> tuple[int, int]:
+    """
+    (models trained at once, threads per model) so that together they
+    use the machine's cores without oversubscribing them.
+    """
+    parallel = max(1, min(jobs, n_models))
+    return parallel, max(1, (os.cpu_count() or 1) // parallel)
+
+
+def fit_one(name: str, params: dict, X_train, X_test, y_train, y_test, threads: int = 1):
+    """
+    Fit and score one model with at most `threads` threads, BLAS included.
+    Returns label, metrics, model
+    """
+    with threadpool_limits(limits=threads):
+        model = build_model(name, params, n_jobs=threads)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        elapsed = time.perf_counter() - start
+
+        metrics = compute_classification_metrics(y_test, y_pred)
+        if hasattr(model, "search_report"):
+            metrics.update(model.search_report(X_test))
+
+    metrics["fit_seconds"] = elapsed
+    return candidate_label(name, params), metrics, model
+
+
+def fit_models(parsed_models, X_train, X_test, y_train, y_test, max_dense_gb: float = 4.0, jobs: int = 1):
+    """
+    Fit every (name, params) model and score it on the test split.
+
+    With jobs > 1 models are trained concurrently in loky worker
+    processes; arrays above 1 MB are memory-mapped to the workers
+    instead of copied into each of them.
+    Results are keyed by candidate label, so one model listed with
+    different params (knn, knn:backend=ivf) keeps every run.
+    Returns results, trained_models
+    """
+    splits = {}
+    if sparse.issparse(X_train) and any(
+        not get_tags(build_model(name, params)).input_tags.sparse for name, params in parsed_models
+    ):
+        # densify once, only for models that cannot take sparse input
+        splits["dense"] = (densify(X_train, max_dense_gb), densify(X_test, max_dense_gb))
+
+    def model_splits(name, params):
+        if "dense" in splits and not get_tags(build_model(name, params)).input_tags.sparse:
+            return splits["dense"]
+        return X_train, X_test
+
+    parallel, threads = thread_budget(jobs, len(parsed_models))
+    tasks = [
+        delayed(fit_one)(name, params, *model_splits(name, params), y_train, y_test, threads)
+        for name, params in parsed_models
+    ]
+
+    if parallel == 1:
+        fitted = [task(*args, **kwargs) for task, args, kwargs in tasks]
+    else:
+        fitted = Parallel(n_jobs=parallel, backend="loky", max_nbytes="1M", mmap_mode="r")(tasks)
+
+    results = {}
+    trained_models = {}
+    for label, metrics, model in fitted:
+        results[label] = metrics
+        trained_models[label] = model
+
+    return results, trained_models
+
+
 @training_app.command()
 def train(
-    data_path: str = typer.Option(..., help="CSV or PKL data path"),
-    models: List[str] = typer.Option(..., help="Model names or 'all'"),
+    data_path: str = typer.Option(..., help="PKL, CSV, Parquet or Arrow data path"),
+    models: List[str] = typer.Option(..., help="Model names or 'all', params as knn:backend=ivf,n_probe=16 (more probes: higher recall, fewer queries/sec)"),
     output_col: str = typer.Option(..., help="Label column"),
     input_col: Optional[str] = typer.Option(None, help="Input column (for CSV)"),
     test_size: float = typer.Option(0.2),
     save_model: Optional[str] = typer.Option(None, help="Save best model name"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Data format: pkl, csv, parquet or arrow (default: from suffix)"),
+    svd_components: int = typer.Option(0, help="Reduce sparse features (TF-IDF) with TruncatedSVD to N components; 0 keeps them sparse"),
+    max_dense_gb: float = typer.Option(4.0, help="Memory limit when a model needs sparse features densified"),
+    reference_path: Optional[str] = typer.Option(None, help="float32 store of the same data; reports the accuracy delta of a float16/int8 store"),
+    jobs: int = typer.Option(1, help="Models trained at the same time; cores are split between them"),
+    groups_path: Optional[str] = typer.Option(None, help="Table with a group id per data row (text dedup --mode group); near duplicates stay on one side of the split"),
+    group_col: str = typer.Option("group", help="Group id column of --groups-path"),
 ):
-    X, y = load_data(data_path, input_col, output_col)
-    X_train, X_test, y_train, y_test = split_data(X, y, test_size)
+    X, y = load_data(data_path, input_col, output_col, fmt)
+    storage_dtype = load_manifest(data_path)["dtype"] if is_embedding_store(data_path) else None
+    groups = None
+    if groups_path:
+        try:
+            groups = load_groups(groups_path, group_col, X.shape[0])
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+    # computed once and reused for --reference-path
+    train_idx, test_idx = split_indices(y, test_size, groups)
+    y = np.asarray(y)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+    svd = None
+    if svd_components and sparse.issparse(X_train):
+        X_train, X_test, svd = reduce_sparse(X_train, X_test, svd_components)
+        print(f"Sparse features reduced to {svd_components} SVD components")
 
     parsed_models = parse_models(models)
 
-    results = {}
-    trained_models = {}
-
-    for name, params in parsed_models:
-        model = build_model(name, params)
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
+    results, trained_models = fit_models(parsed_models, X_train, X_test, y_train, y_test, max_dense_gb, jobs)
 
-        metrics = compute_classification_metrics(y_test, y_pred)
-        results[name] = metrics
-        trained_models[name] = model
+    reference = None
+    if reference_path:
+        X_ref, y_ref = load_data(reference_path, input_col, output_col)
+        if not np.array_equal(np.asarray(y_ref), y):
+            raise typer.BadParameter("reference data must hold the same rows and labels")
+        X_ref_train, X_ref_test = X_ref[train_idx], X_ref[test_idx]
+        if svd_components and sparse.issparse(X_ref_train):
+            X_ref_train, X_ref_test, _ = reduce_sparse(X_ref_train, X_ref_test, svd_components)
+        reference, _ = fit_models(parsed_models, X_ref_train, X_ref_test, y_train, y_test, max_dense_gb, jobs)
 
     print("\n Training Results")
     print("-" * 30)
@@ -142,21 +329,389 @@ def train(
         print(f"Precision: {m['precision']:.3f}")
         print(f"Recall   : {m['recall']:.3f}")
         print(f"F1-score : {m['f1']:.3f}")
+        print(f"Fit time : {m['fit_seconds']:.2f} s")
+        if "queries_per_sec" in m:
+            print(f"Queries/sec: {m['queries_per_sec']:.0f}")
+            print(f"Recall@{m['k']} vs exact: {m['recall_at_k']:.3f}")
+        if reference:
+            print(f"Accuracy delta vs float32: {m['accuracy'] - reference[name]['accuracy']:+.4f}")
 
     if save_model:
         best = max(results, key=lambda k: results[k]["f1"])
         Path("outputs/models").mkdir(parents=True, exist_ok=True)
         with open(f"outputs/models/{save_model}", "wb") as f:
             pickle.dump(trained_models[best], f)
+        save_feature_config(f"outputs/models/{save_model}", feature_config(data_path), svd)
 
         print(f"\n Best model saved: outputs/models/{save_model}")
 
         report_file = write_training_report(
         results=results,
-        num_samples=len(X),
+        num_samples=X.shape[0],
         num_features=X.shape[1],
         test_size=test_size,
+        storage_dtype=storage_dtype,
+        reference=reference,
         )
 
         print(f"\n📝 Training report saved to: {report_file}")
 
+
+
+def cv_folds(y, n_splits: int, groups=None) -> list:
+    """
+    Stratified folds computed once and shared by every candidate of
+    every model, instead of being re-split for each search.
+    With groups, a group's rows stay within one fold.
+    """
+    if groups is not None:
+        splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=42)
+        return list(splitter.split(np.zeros(len(y)), y, groups))
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+
+def grid_searches(name: str, grid: dict) -> list:
+    """
+    Split a grid into searches over params the estimator can set.
+    CONSTRUCTOR_PARAMS (knn backend) choose the estimator class, so one
+    estimator is built per combination of them, and the rest of the grid
+    is searched on it, keeping only params that estimator has (n_probe
+    is dropped for backend=brute).
+    Returns list of (constructor params, estimator, grid)
+    """
+    fixed = [k for k in CONSTRUCTOR_PARAMS.get(name.lower(), ()) if k in grid]
+
+    searches, used = [], set(fixed)
+    for values in itertools.product(*(grid[k] for k in fixed)):
+        constructor = dict(zip(fixed, values))
+        estimator = build_model(name, constructor)
+        params = estimator.get_params()
+        search_grid = {k: v for k, v in grid.items() if k not in fixed and k in params}
+        used.update(search_grid)
+        searches.append((constructor, estimator, search_grid))
+
+    unknown = set(grid) - used
+    if unknown:
+        raise ValueError(f"Invalid parameters for {name}: {', '.join(sorted(unknown))}")
+    return searches
+
+
+def candidate_label(name: str, params: dict) -> str:
+    if not params:
+        return name
+    return f"{name}:" + ",".join(f"{k}={v}" for k, v in params.items())
+
+
+@training_app.command()
+def tune(
+    data_path: str = typer.Option(..., help="PKL, CSV, Parquet or Arrow data path"),
+    models: List[str] = typer.Option(..., help="Grids like knn:n_neighbors=3|5|11,weights=uniform|distance, or 'all'"),
+    output_col: str = typer.Option(..., help="Label column"),
+    input_col: Optional[str] = typer.Option(None, help="Input column (for CSV)"),
+    test_size: float = typer.Option(0.2),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Data format: pkl, csv, parquet or arrow (default: from suffix)"),
+    cv: int = typer.Option(5, help="Cross-validation folds"),
+    halving: bool = typer.Option(False, "--halving", help="Successive halving: score all candidates on a few samples, keep the best 1/factor with more samples"),
+    factor: int = typer.Option(3, help="Halving factor"),
+    jobs: int = typer.Option(1, help="Parallel cross-validation fits"),
+    top: int = typer.Option(3, help="Best candidates per model refitted and scored on the test split"),
+    save_model: Optional[str] = typer.Option(None, help="Save best model name"),
+    max_dense_gb: float = typer.Option(4.0, help="Memory limit when a model needs sparse features densified"),
+    groups_path: Optional[str] = typer.Option(None, help="Table with a group id per data row (text dedup --mode group); groups are kept within one split and one fold"),
+    group_col: str = typer.Option("group", help="Group id column of --groups-path"),
+):
+    """
+    Grid search with cross-validation; writes a leaderboard report.
+    """
+    X, y = load_data(data_path, input_col, output_col, fmt)
+    groups = train_groups = None
+    if groups_path:
+        try:
+            groups = load_groups(groups_path, group_col, X.shape[0])
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+    train_idx, test_idx = split_indices(y, test_size, groups)
+    if groups is not None:
+        train_groups = groups[train_idx]
+    y = np.asarray(y)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+    folds = cv_folds(y_train, cv, train_groups)
+
+    leaderboard = {}
+    trained_models = {}
+    cv_results = {}
+    dense_splits = None
+    total_fits = 0
+
+    for name, grid in parse_grids(models):
+        try:
+            searches = grid_searches(name, grid)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+
+        candidates = []
+        for constructor, estimator, search_grid in searches:
+            fit_X, eval_X = X_train, X_test
+            if sparse.issparse(X_train) and not get_tags(estimator).input_tags.sparse:
+                if dense_splits is None:
+                    dense_splits = (densify(X_train, max_dense_gb), densify(X_test, max_dense_gb))
+                fit_X, eval_X = dense_splits
+
+            if halving:
+                search = HalvingGridSearchCV(
+                    estimator, search_grid, factor=factor, scoring="f1_weighted", cv=folds,
+                    n_jobs=jobs, refit=False, random_state=42,
+                )
+            else:
+                search = GridSearchCV(estimator, search_grid, scoring="f1_weighted", cv=folds, n_jobs=jobs, refit=False)
+            search.fit(fit_X, y_train)
+
+            results = search.cv_results_
+            scores = np.nan_to_num(results["mean_test_score"], nan=-np.inf)
+            indices = np.arange(len(scores))
+            if halving:
+                # only the last round saw the full training data
+                indices = indices[results["iter"] == results["iter"].max()]
+                total_fits += sum(search.n_candidates_) * len(folds)
+            else:
+                total_fits += len(scores) * len(folds)
+
+            cv_results[candidate_label(name, constructor)] = [
+                {
+                    "rank": int(results["rank_test_score"][i]),
+                    "mean_test_score": float(results["mean_test_score"][i]),
+                    "std_test_score": float(results["std_test_score"][i]),
+                    "params": {**constructor, **results["params"][i]},
+                }
+                for i in range(len(scores))
+            ]
+            candidates += [(scores[i], {**constructor, **results["params"][i]}, fit_X, eval_X) for i in indices]
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+        for score, params, fit_X, eval_X in candidates[:top]:
+            _, metrics, model = fit_one(name, params, fit_X, eval_X, y_train, y_test)
+            metrics["cv_f1"] = score
+
+            label = candidate_label(name, params)
+            leaderboard[label] = metrics
+            trained_models[label] = model
+
+    leaderboard = dict(sorted(leaderboard.items(), key=lambda item: -item[1]["f1"]))
+
+    print("\n Tuning Leaderboard")
+    print("-" * 30)
+    print(f"{len(folds)}-fold CV, {total_fits} fits{' (successive halving)' if halving else ''}\n")
+    for rank, (label, m) in enumerate(leaderboard.items(), 1):
+        print(f"{rank:>2}. {label:<45} CV F1 {m['cv_f1']:.3f}  Test Acc {m['accuracy']:.3f}  Test F1 {m['f1']:.3f}")
+
+    best = next(iter(leaderboard))
+    if save_model:
+        Path("outputs/models").mkdir(parents=True, exist_ok=True)
+        with open(f"outputs/models/{save_model}", "wb") as f:
+            pickle.dump(trained_models[best], f)
+        save_feature_config(f"outputs/models/{save_model}", feature_config(data_path))
+
+        print(f"\n Best model saved: outputs/models/{save_model}")
+
+    report_file = write_training_report(
+        results=leaderboard,
+        num_samples=X.shape[0],
+        num_features=X.shape[1],
+        test_size=test_size,
+        cv_results=cv_results,
+    )
+
+    print(f"\n📝 Tuning report saved to: {report_file}")
+
+
+PREDICT_STAGES = ("read", "clean", "embed", "predict", "write")
+
+
+def resolve_model_path(model_path: str) -> Path:
+    """
+    A bare file name refers to outputs/models/, where train saves models.
+    """
+    path = Path(model_path)
+    if not path.exists() and path.parent == Path("."):
+        path = Path("outputs/models") / path
+    if not path.exists():
+        raise typer.BadParameter(f"Model not found: {model_path}")
+    return path
+
+
+def load_predictor(model_path: str, vectorizer: str | None, embedding_model: str | None, engine: str, workers: int = 1):
+    """
+    The saved model and a Featurizer for its feature config, or for the
+    --vectorizer / --embedding-model override.
+    Returns model, featurizer
+    """
+    path = resolve_model_path(model_path)
+    with open(path, "rb") as f:
+        model = pickle.load(f)
+
+    config = load_feature_config(path)
+    # the training texts were cleaned the same way whatever the features
+    cleaning = config.get("cleaning")
+    if vectorizer:
+        config = {"method": "tfidf", "vectorizer": vectorizer, "cleaning": cleaning}
+    elif embedding_model:
+        config = {"method": "model2vec", "model": embedding_model, "engine": engine, "cleaning": cleaning}
+    if not config:
+        raise typer.BadParameter(
+            f"No feature config saved with {path}; pass --vectorizer or --embedding-model"
+        )
+
+    try:
+        return model, Featurizer(config, workers=workers)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+
+def build_cleaner(saved: dict | None, **flags):
+    """
+    Cleaning pipeline for new texts: the flags saved with the model,
+    each overridden by its option when given (--remove / --no-remove).
+    """
+    flags = {
+        flag: flags[flag] if flags.get(flag) is not None else bool((saved or {}).get(flag))
+        for flag in CLEANING_FLAGS
+    }
+    if not any(flags.values()):
+        return None
+    return CleaningPipeline(**flags)
+
+
+@training_app.command()
+def predict(
+    model_path: str = typer.Option(..., help="Model saved by 'model train' or 'model tune' (.pkl)"),
+    input_path: str = typer.Option(..., help="CSV, Parquet or Arrow file with the texts"),
+    text_col: str = typer.Option(..., help="Text column"),
+    output: str = typer.Option(..., help="Predictions file: .csv, .parquet or .arrow"),
+    proba: bool = typer.Option(False, "--proba", help="Add a probability column per class"),
+    batch_size: int = typer.Option(10_000, help="Rows read, cleaned, embedded and predicted per batch"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="Input format: csv, parquet or arrow (default: from suffix)"),
+    remove: Optional[bool] = typer.Option(None, "--remove/--no-remove", help="Clean texts as 'text preprocess --remove' (default: as the training texts)"),
+    replace_light: Optional[bool] = typer.Option(None, "--replace-light/--no-replace-light"),
+    replace_aggressive: Optional[bool] = typer.Option(None, "--replace-aggressive/--no-replace-aggressive"),
+    stopwords: Optional[bool] = typer.Option(None, "--stopwords/--no-stopwords"),
+    vectorizer: Optional[str] = typer.Option(None, help="TF-IDF vectorizer to use instead of the one saved with the model"),
+    embedding_model: Optional[str] = typer.Option(None, help="Model2Vec model to use instead of the one saved with the model"),
+    engine: str = typer.Option("native", help="Encoder for --embedding-model: native or sentence-transformers"),
+    workers: int = typer.Option(1, help="Encoding processes (Model2Vec features)"),
+):
+    """
+    Predict labels for new texts with a saved model, streaming the input
+    through clean -> embed -> predict one batch at a time.
+    """
+    model, featurizer = load_predictor(model_path, vectorizer, embedding_model, engine, workers)
+    if proba and not hasattr(model, "predict_proba"):
+        raise typer.BadParameter(f"{type(model).__name__} has no predict_proba")
+
+    cleaner = build_cleaner(
+        featurizer.config.get("cleaning"),
+        remove=remove, replace_light=replace_light, replace_aggressive=replace_aggressive, stopwords=stopwords,
+    )
+    needs_dense = not get_tags(model).input_tags.sparse
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    timings = dict.fromkeys(PREDICT_STAGES, 0.0)
+    batches = 0
+    start = time.perf_counter()
+
+    chunks = iter_batches(input_path, chunksize=batch_size, fmt=fmt)
+    with TableWriter(output) as writer:
+        while True:
+            t0 = time.perf_counter()
+            chunk = next(chunks, None)
+            t1 = time.perf_counter()
+            if chunk is None:
+                break
+            if text_col not in chunk.columns:
+                raise typer.BadParameter(f"Column '{text_col}' not found in {input_path}")
+
+            texts = chunk[text_col].astype(str)
+            if cleaner is not None:
+                texts = cleaner.clean_series(texts)
+            t2 = time.perf_counter()
+
+            X = featurizer.transform(texts.tolist())
+            if needs_dense and sparse.issparse(X):
+                X = X.toarray()
+            t3 = time.perf_counter()
+
+            chunk = chunk.copy()
+            if proba:
+                probabilities = model.predict_proba(X)
+                chunk["prediction"] = model.classes_[probabilities.argmax(axis=1)]
+                for i, label in enumerate(model.classes_):
+                    chunk[f"proba_{label}"] = probabilities[:, i]
+            else:
+                chunk["prediction"] = model.predict(X)
+            t4 = time.perf_counter()
+
+            writer.write(chunk)
+            t5 = time.perf_counter()
+
+            for stage, elapsed in zip(PREDICT_STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                timings[stage] += elapsed
+            batches += 1
+
+    featurizer.close()
+    elapsed = time.perf_counter() - start
+
+    typer.echo("\nPrediction Done")
+    typer.echo("-----------------------------------")
+    typer.echo(f"Rows           : {writer.rows}")
+    typer.echo(f"Batches        : {batches} of up to {batch_size} rows")
+    typer.echo(f"Throughput     : {writer.rows / max(elapsed, 1e-12):.0f} rows/sec")
+    typer.echo("Stage latency  : per batch (share of total time)")
+    for stage in PREDICT_STAGES:
+        typer.echo(
+            f"  {stage:<12} : {timings[stage] / max(batches, 1) * 1000:.1f} ms "
+            f"({timings[stage] / max(elapsed, 1e-12):.0%})"
+        )
+    typer.echo(f"Saved To       : {output}\n")
+
+
+@training_app.command()
+def serve(
+    model_path: str = typer.Option(..., help="Model saved by 'model train' or 'model tune' (.pkl)"),
+    host: str = typer.Option("127.0.0.1", help="Address to listen on"),
+    port: int = typer.Option(8000, help="TCP port"),
+    unix_socket: Optional[str] = typer.Option(None, help="Listen on this Unix socket path instead of TCP"),
+    max_batch_size: int = typer.Option(256, help="Texts grouped into one encoder call at most"),
+    max_wait_ms: float = typer.Option(5.0, help="How long a batch waits for more concurrent requests"),
+    remove: Optional[bool] = typer.Option(None, "--remove/--no-remove", help="Clean texts as 'text preprocess --remove' (default: as the training texts)"),
+    replace_light: Optional[bool] = typer.Option(None, "--replace-light/--no-replace-light"),
+    replace_aggressive: Optional[bool] = typer.Option(None, "--replace-aggressive/--no-replace-aggressive"),
+    stopwords: Optional[bool] = typer.Option(None, "--stopwords/--no-stopwords"),
+    vectorizer: Optional[str] = typer.Option(None, help="TF-IDF vectorizer to use instead of the one saved with the model"),
+    embedding_model: Optional[str] = typer.Option(None, help="Model2Vec model to use instead of the one saved with the model"),
+    engine: str = typer.Option("native", help="Encoder for --embedding-model: native or sentence-transformers"),
+):
+    """
+    Serve clean / embed / predict over local HTTP, keeping the model,
+    encoder and stopwords loaded between requests.
+    """
+    model, featurizer = load_predictor(model_path, vectorizer, embedding_model, engine)
+    service = InferenceService(
+        model,
+        featurizer,
+        build_cleaner(
+            featurizer.config.get("cleaning"),
+            remove=remove, replace_light=replace_light, replace_aggressive=replace_aggressive, stopwords=stopwords,
+        ),
+        needs_dense=not get_tags(model).input_tags.sparse,
+    )
+    server = InferenceServer(service, max_batch_size, max_wait_ms)
+
+    address = f"unix:{unix_socket}" if unix_socket else f"http://{host}:{port}"
+    typer.echo(f"Serving {model_path} on {address} (POST /clean /embed /predict, GET /stats)")
+    try:
+        asyncio.run(server.serve(host, port, unix_socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        featurizer.close()
+        typer.echo(json.dumps(server.stats.snapshot(), indent=2))
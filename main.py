@@ -1,21 +1,51 @@
+import importlib
+
 import typer
-from commands.generate import generate_app
-from commands.eda import eda_app
-from commands.preprocessing import preprocess_app
-from commands.embedding import embedding_app
-from commands.training import training_app
+from typer.core import TyperGroup
+
+# name -> (module, Typer app, help). A sub-app's module, and the libraries
+# it needs (sklearn, matplotlib, genai, ...), are imported only when one
+# of its commands runs, so --help and light commands start fast.
+SUB_APPS = {
+    "generate": ("commands.generate", "generate_app", "Generate synthetic data with Gemini"),
+    "eda": ("commands.eda", "eda_app", "Exploratory Data Analysis commands"),
+    "text": ("commands.preprocessing", "preprocess_app", "Clean and normalize Arabic text"),
+    "embd": ("commands.embedding", "embedding_app", "TF-IDF and Model2Vec embeddings"),
+    "model": ("commands.training", "training_app", "Train, tune and run models"),
+    "pipeline": ("commands.pipeline", "pipeline_app", "Run preprocess -> embed -> train as one cached pipeline"),
+}
+
+
+class LazyGroup(TyperGroup):
+    """
+    Lists the sub-apps from SUB_APPS without importing them; the real
+    sub-app is built when the command line resolves to it.
+    """
+
+    def __init__(self, **attrs):
+        super().__init__(**attrs)
+        for name, (_, _, help) in SUB_APPS.items():
+            # placeholders for the command list in --help
+            self.commands.setdefault(name, TyperGroup(name=name, help=help))
+
+    def resolve_command(self, ctx, args):
+        name, command, args = super().resolve_command(ctx, args)
+        if name in SUB_APPS:
+            module, attr, _ = SUB_APPS[name]
+            command = typer.main.get_group(getattr(importlib.import_module(module), attr))
+            command.name = name
+        return name, command, args
 
-app = typer.Typer()
 
-app.add_typer(generate_app, name="generate")
-app.add_typer(eda_app, name="eda")
-app.add_typer(preprocess_app, name="text")
-app.add_typer(embedding_app, name="embd")
-app.add_typer(training_app, name="model")
+app = typer.Typer(cls=LazyGroup)
 
 
+@app.callback()
+def cli():
+    """
+    Arabic NLP CLI tool.
+    """
 
-    
 
 if __name__ == "__main__":
     app()
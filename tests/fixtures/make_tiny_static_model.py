@@ -0,0 +1,52 @@
+"""
+Write tests/fixtures/tiny_static_model: an 8-token static embedding model
+(model.safetensors + tokenizer.json) for the encoder parity tests.
+
+The tokenizer adds [CLS]/[SEP] and pads to 8 tokens, like tokenizers saved
+with those settings, so an encoder that does not disable them pools the
+wrong tokens.
+
+    python tests/fixtures/make_tiny_static_model.py
+"""
+from pathlib import Path
+
+import numpy as np
+from safetensors.numpy import save_file
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from tokenizers.processors import TemplateProcessing
+
+
+VOCAB = ["[UNK]", "[PAD]", "[CLS]", "[SEP]", "قط", "كلب", "بيت", "كبير"]
+
+TABLE = np.array([
+    [-0.74, 0.00, 0.20, -0.94],
+    [-0.70, 0.86, -0.86, -0.74],
+    [0.90, 0.24, -0.26, 0.02],
+    [0.33, -0.45, -0.72, 0.58],
+    [0.34, 0.02, 0.63, 0.10],
+    [0.96, -0.59, 0.11, -0.03],
+    [-0.29, 0.18, -0.53, 0.60],
+    [0.73, -0.74, -0.07, -0.45],
+], dtype=np.float32)
+
+
+def main():
+    out = Path(__file__).parent / "tiny_static_model"
+    out.mkdir(exist_ok=True)
+
+    tokenizer = Tokenizer(WordLevel({token: i for i, token in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.post_processor = TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    tokenizer.enable_padding(pad_id=1, pad_token="[PAD]", length=8)
+    tokenizer.save(str(out / "tokenizer.json"))
+
+    # model2vec's tensor name
+    save_file({"embeddings": TABLE}, str(out / "model.safetensors"))
+
+
+if __name__ == "__main__":
+    main()
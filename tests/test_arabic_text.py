@@ -0,0 +1,48 @@
+import itertools
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils.arabic_text import CleaningPipeline, clean_arabic_text
+
+
+FLAG_NAMES = ["remove", "replace_light", "replace_aggressive", "stopwords"]
+
+DATA = Path(__file__).parents[1] / "outputs" / "data" / "synthetic.csv"
+
+# links, tashkeel, tatweel, punctuation, repeats, English, letter
+# variants, stopwords, odd whitespace and non-strings
+TEXTS = [
+    "أحبُّ السيارةَ الجديدةَ جداً، إنها رائعةٌ!!!",
+    "زوروا موقعنا www.example.com أو http://x.co/a?b=1 الآن",
+    "جمــــيل جدااااا هههههه",
+    "Hello مرحبا World 123",
+    "إلى أين أنت ذاهب؟ هذه مدرسة مؤسسة بيئة",
+    "  مسافات\tكثيرة \n هنا  ",
+    "من في على عن هذا",
+    "",
+    "!!!",
+    None,
+    float("nan"),
+    42,
+]
+
+
+def texts() -> pd.Series:
+    series = pd.Series(TEXTS, dtype=object)
+    if DATA.is_file():
+        series = pd.concat([series, pd.read_csv(DATA)["text"]], ignore_index=True)
+    return series
+
+
+@pytest.mark.parametrize("values", list(itertools.product([False, True], repeat=len(FLAG_NAMES))))
+def test_pipeline_matches_clean_arabic_text(values):
+    flags = dict(zip(FLAG_NAMES, values))
+    series = texts()
+    pipeline = CleaningPipeline(**flags)
+
+    expected = series.map(lambda text: clean_arabic_text(text, **flags))
+
+    assert series.map(pipeline).equals(expected)
+    assert pipeline.clean_series(series).equals(expected)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from utils.generation import StubClient, SyntheticDataGenerator
+
+
+CLASSES = ["positive", "negative", "neutral"]
+
+
+def generator(output, client=None, count=20, **kwargs) -> SyntheticDataGenerator:
+    kwargs = {"batch_size": 4, "rate_per_minute": 0, "backoff": 0.0, **kwargs}
+    return SyntheticDataGenerator(client or StubClient(latency=0), "reviews", CLASSES, count, output, **kwargs)
+
+
+def test_rows_per_class(tmp_path):
+    output = tmp_path / "synthetic.csv"
+    summary = asyncio.run(generator(output).run())
+
+    assert summary["missing"] == {}
+    assert summary["rows"] == {"positive": 7, "negative": 7, "neutral": 6}
+    df = pd.read_csv(output)
+    assert df["label"].value_counts().to_dict() == summary["rows"]
+    assert not output.with_suffix(".csv.checkpoint.json").exists()
+
+
+def test_failed_requests_are_retried(tmp_path):
+    output = tmp_path / "synthetic.csv"
+    client = StubClient(latency=0, failure_rate=0.5, seed=1)
+    summary = asyncio.run(generator(output, client, max_retries=10).run())
+
+    assert summary["retries"] > 0
+    assert summary["missing"] == {}
+    assert summary["requests"] == client.calls
+    assert len(pd.read_csv(output)) == 20
+
+
+def test_resume_drops_half_written_append(tmp_path):
+    output = tmp_path / "synthetic.csv"
+    checkpoint = output.with_suffix(".csv.checkpoint.json")
+    first = generator(output, count=6, batch_size=2)
+    first._append("positive", [("نص أول", "positive"), ("نص ثان", "positive")])
+    written = output.read_bytes()
+    with open(output, "ab") as f:
+        f.write('"نص مقطوع'.encode("utf-8"))
+
+    summary = asyncio.run(generator(output, count=6, batch_size=2).run())
+
+    df = pd.read_csv(output)
+    assert output.read_bytes().startswith(written)
+    assert summary["rows"] == {"positive": 2, "negative": 2, "neutral": 2}
+    assert len(df) == 6
+    assert list(df["text"][:2]) == ["نص أول", "نص ثان"]
+    assert not checkpoint.exists()
+
+
+def test_resume_refuses_truncated_output(tmp_path):
+    output = tmp_path / "synthetic.csv"
+    generator(output, count=6)._append("positive", [("نص", "positive")])
+    output.write_bytes(output.read_bytes()[:5])
+
+    with pytest.raises(ValueError, match="--restart"):
+        generator(output, count=6)
+
+
+def test_resume_refuses_other_settings(tmp_path):
+    output = tmp_path / "synthetic.csv"
+    generator(output, count=6)._append("positive", [("نص", "positive")])
+
+    with pytest.raises(ValueError, match="other settings"):
+        generator(output, count=9)
+
+
+def test_existing_output_is_not_overwritten(tmp_path):
+    output = tmp_path / "synthetic.csv"
+    output.write_text("text,label\nمحفوظ,positive\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="already exists"):
+        generator(output)
+    assert pd.read_csv(output)["text"].tolist() == ["محفوظ"]
+
+    asyncio.run(generator(output, restart=True).run())
+    assert len(pd.read_csv(output)) == 20
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.static_encoder import StaticEncoder, model_revision
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "tiny_static_model"
+
+# the fixture's embedding table, written out by hand
+TABLE = np.array([
+    [-0.74, 0.00, 0.20, -0.94],   # [UNK]
+    [-0.70, 0.86, -0.86, -0.74],  # [PAD]
+    [0.90, 0.24, -0.26, 0.02],    # [CLS]
+    [0.33, -0.45, -0.72, 0.58],   # [SEP]
+    [0.34, 0.02, 0.63, 0.10],     # قط
+    [0.96, -0.59, 0.11, -0.03],   # كلب
+    [-0.29, 0.18, -0.53, 0.60],   # بيت
+    [0.73, -0.74, -0.07, -0.45],  # كبير
+], dtype=np.float32)
+
+# texts and the token ids they must pool: no [CLS]/[SEP], no padding,
+# unknown words map to [UNK]
+CASES = [
+    ("قط كلب", [4, 5]),
+    ("كلب كلب قط", [5, 5, 4]),
+    ("بيت كبير جدا", [6, 7, 0]),
+    ("", []),
+    ("قط", [4]),
+    ("بيت قط كبير كلب بيت قط كبير كلب", [6, 4, 7, 5, 6, 4, 7, 5]),
+]
+
+
+def expected_vectors(normalize: bool = True) -> np.ndarray:
+    out = np.zeros((len(CASES), TABLE.shape[1]), dtype=np.float32)
+    for i, (_, ids) in enumerate(CASES):
+        if ids:
+            out[i] = TABLE[ids].mean(axis=0)
+    if normalize:
+        out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+    return out
+
+
+@pytest.fixture(scope="module")
+def encoder():
+    return StaticEncoder(str(FIXTURE))
+
+
+def test_tokenize_matches_expected_ids(encoder):
+    ids, lengths = encoder.tokenize([text for text, _ in CASES])
+    assert lengths.tolist() == [len(expected) for _, expected in CASES]
+    assert ids.tolist() == [i for _, expected in CASES for i in expected]
+
+
+@pytest.mark.parametrize("normalize", [True, False])
+def test_encode_matches_hand_computed_vectors(normalize):
+    encoder = StaticEncoder(str(FIXTURE), normalize=normalize)
+    vectors = encoder.encode([text for text, _ in CASES])
+    np.testing.assert_allclose(vectors, expected_vectors(normalize), atol=1e-6)
+
+
+@pytest.mark.parametrize("batch_size, max_tokens", [(1, None), (4, None), (1024, 3), (1024, 1)])
+def test_batching_keeps_vectors_and_order(encoder, batch_size, max_tokens):
+    vectors = encoder.encode([text for text, _ in CASES], batch_size=batch_size, max_tokens=max_tokens)
+    np.testing.assert_allclose(vectors, expected_vectors(), atol=1e-6)
+
+
+def test_matches_sentence_transformers(encoder):
+    torch = pytest.importorskip("torch")
+    models = pytest.importorskip("sentence_transformers.models")
+    from sentence_transformers import SentenceTransformer
+
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(str(FIXTURE / "tokenizer.json"))
+    static = models.StaticEmbedding(tokenizer, embedding_weights=torch.from_numpy(TABLE))
+    model = SentenceTransformer(modules=[static])
+    texts = [text for text, _ in CASES]
+    expected = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    np.testing.assert_allclose(encoder.encode(texts), expected, atol=1e-6)
+
+
+def test_model_revision_hashes_any_layout(tmp_path):
+    # a transformer layout, without model.safetensors or tokenizer.json
+    (tmp_path / "config.json").write_text("{}")
+    (tmp_path / "pytorch_model.bin").write_bytes(b"weights")
+    first = model_revision(str(tmp_path))
+
+    (tmp_path / "pytorch_model.bin").write_bytes(b"other weights")
+    model_revision.cache_clear()
+    assert model_revision(str(tmp_path)) != first
@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+
+BACKENDS = ("ivf", "hnsw")
+
+# rows per block when scoring queries, bounds the query x list score matrix
+_QUERY_BLOCK = 4096
+
+
+def _normalized(X) -> np.ndarray:
+    X = np.array(X, dtype=np.float32)
+    X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    return X
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The k highest scores per row (best first) with their ids.
+    """
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        ids = np.take_along_axis(ids, part, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+def spherical_kmeans(X: np.ndarray, n_clusters: int, n_iter: int = 10, random_state: int = 0) -> np.ndarray:
+    """
+    Unit-norm centroids maximizing inner product with their members.
+    """
+    rng = np.random.default_rng(random_state)
+    centroids = X[rng.choice(len(X), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assign = np.concatenate([
+            (X[start:start + _QUERY_BLOCK] @ centroids.T).argmax(axis=1)
+            for start in range(0, len(X), _QUERY_BLOCK)
+        ])
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, X)
+        empty = np.bincount(assign, minlength=n_clusters) == 0
+        # restart empty clusters from random points
+        sums[empty] = X[rng.choice(len(X), int(empty.sum()), replace=False)]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+    return centroids
+
+
+class ANNKNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """
+    KNN classifier on approximate inner-product search, for normalized
+    embeddings (inner product == cosine similarity).
+
+    backend="ivf": NumPy IVF-flat index. Training vectors are grouped
+    by their nearest of n_lists k-means centroids; a query scans only
+    its n_probe closest lists. n_probe is the recall/latency knob
+    (n_probe == n_lists is exact search). Recall at a given n_probe
+    depends on how clustered the data is: with the default 16 of ~140
+    lists on 20k rows, recall@5 is ~0.5 on uniform noise and near 1 on
+    well-clustered data; each doubling costs about half the throughput.
+    search_report gives the recall to tune it against.
+    backend="hnsw": hnswlib graph index (optional dependency); ef is
+    the recall/latency knob.
+    """
+
+    def __init__(self, n_neighbors: int = 5, backend: str = "ivf", n_lists: int | None = None,
+                 n_probe: int = 16, ef: int = 64, weights: str = "uniform", random_state: int = 0):
+        self.n_neighbors = n_neighbors
+        self.backend = backend
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.ef = ef
+        self.weights = weights
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+
+        X = _normalized(X)
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+
+        if self.backend == "hnsw":
+            import hnswlib
+
+            self.index_ = hnswlib.Index(space="ip", dim=X.shape[1])
+            self.index_.init_index(max_elements=len(X), ef_construction=200, M=16)
+            self.index_.add_items(X, np.arange(len(X)))
+            return self
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(X))))
+        rng = np.random.default_rng(self.random_state)
+        sample = X[rng.choice(len(X), min(len(X), 256 * n_lists), replace=False)]
+        self.centroids_ = spherical_kmeans(sample, min(n_lists, len(sample)), random_state=self.random_state)
+
+        assign = np.concatenate([
+            (X[start:start + _QUERY_BLOCK] @ self.centroids_.T).argmax(axis=1)
+            for start in range(0, len(X), _QUERY_BLOCK)
+        ])
+        # inverted lists: vectors sorted by list, list l is rows offsets_[l]:offsets_[l + 1]
+        self.ids_ = np.argsort(assign, kind="stable")
+        self.vectors_ = X[self.ids_]
+        self.offsets_ = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(self.centroids_)))])
+        return self
+
+    def _search_ivf(self, Q: np.ndarray, k: int, n_probe: int):
+        n_lists = len(self.centroids_)
+        n_probe = min(n_probe, n_lists)
+        probes = np.argpartition(-(Q @ self.centroids_.T), n_probe - 1, axis=1)[:, :n_probe]
+
+        best_scores = np.full((len(Q), k), -np.inf, dtype=np.float32)
+        best_ids = np.full((len(Q), k), -1, dtype=np.int64)
+
+        # queries probing each list, from one sort of the probe table
+        flat = probes.ravel()
+        order = np.argsort(flat, kind="stable")
+        bounds = np.searchsorted(flat[order], np.arange(n_lists + 1))
+
+        for lst in np.unique(flat):
+            queries = order[bounds[lst]:bounds[lst + 1]] // n_probe
+            start, stop = self.offsets_[lst], self.offsets_[lst + 1]
+            if start == stop:
+                continue
+
+            scores = Q[queries] @ self.vectors_[start:stop].T
+            ids = np.broadcast_to(np.arange(start, stop), scores.shape)
+            best_scores[queries], best_ids[queries] = _top_k(
+                np.hstack([best_scores[queries], scores]),
+                np.hstack([best_ids[queries], ids]),
+                k,
+            )
+
+        # positions in the sorted list layout -> training row ids
+        return best_scores, np.where(best_ids >= 0, self.ids_[np.maximum(best_ids, 0)], -1)
+
+    def kneighbors(self, X, n_neighbors: int | None = None, exact: bool = False):
+        """
+        (similarities, training row ids) of the nearest neighbors, best first.
+        exact=True scans every training vector.
+        """
+        k = n_neighbors or self.n_neighbors
+        Q = _normalized(X)
+
+        if self.backend == "hnsw" and not exact:
+            # hnswlib raises when asked for more neighbors than it holds
+            k = min(k, self.index_.get_current_count())
+            self.index_.set_ef(max(self.ef, k))
+            ids, distances = self.index_.knn_query(Q, k=k)
+            return 1 - distances, ids.astype(np.int64)
+
+        if exact:
+            vectors = self.vectors_ if self.backend == "ivf" else self.index_.get_items(np.arange(len(self._y)))
+            vectors = np.asarray(vectors, dtype=np.float32)
+            row_ids = self.ids_ if self.backend == "ivf" else np.arange(len(vectors))
+            results = [
+                _top_k(Q[s:s + _QUERY_BLOCK] @ vectors.T, np.broadcast_to(row_ids, (len(Q[s:s + _QUERY_BLOCK]), len(row_ids))), k)
+                for s in range(0, len(Q), _QUERY_BLOCK)
+            ]
+            return np.vstack([r[0] for r in results]), np.vstack([r[1] for r in results])
+
+        results = [self._search_ivf(Q[s:s + _QUERY_BLOCK], k, self.n_probe) for s in range(0, len(Q), _QUERY_BLOCK)]
+        return np.vstack([r[0] for r in results]), np.vstack([r[1] for r in results])
+
+    def predict_proba(self, X):
+        similarities, ids = self.kneighbors(X)
+        found = ids >= 0
+        if self.weights == "distance":
+            weights = 1 / np.maximum(1 - similarities, 1e-6)
+        else:
+            weights = np.ones_like(similarities)
+        weights = np.where(found, weights, 0)
+
+        votes = np.zeros((len(ids), len(self.classes_)))
+        rows = np.repeat(np.arange(len(ids)), ids.shape[1])
+        np.add.at(votes, (rows, self._y[np.maximum(ids, 0)].ravel()), weights.ravel())
+        return votes / np.maximum(votes.sum(axis=1, keepdims=True), 1e-12)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def search_report(self, X) -> dict:
+        """
+        Query throughput of the index and recall@k against exact search.
+        """
+        k = self.n_neighbors
+        start = time.perf_counter()
+        _, approx = self.kneighbors(X)
+        elapsed = time.perf_counter() - start
+
+        _, exact = self.kneighbors(X, exact=True)
+        hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx, exact))
+        return {
+            "queries_per_sec": len(approx) / max(elapsed, 1e-12),
+            "recall_at_k": hits / max(exact.size, 1),
+            "k": k,
+        }
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from pyarabic.araby import strip_tashkeel, strip_tatweel
 from camel_tools.utils.normalize import normalize_alef_ar, normalize_alef_maksura_ar
 from pathlib import Path
@@ -121,17 +122,19 @@ def remove_text(text: str) -> str:
 
 
 
-STOPWORDS_PATH = Path(r"C:\Users\HP\Desktop\SDAIA_BOOTCAMP5\nlp-cli-tool\resources\stopwords_nltk.txt")
+STOPWORDS_PATH = Path(__file__).parents[1] / "resources" / "stopwords_nltk.txt"
 
-def load_stopwords() -> set[str]:
+@lru_cache(maxsize=None)
+def load_stopwords() -> frozenset[str]:
+    """
+    Read on first use, not at import, and cached.
+    """
     with open(STOPWORDS_PATH, encoding="utf-8") as f:
-        return {
+        return frozenset(
             line.strip()
             for line in f
             if line.strip() and not line.startswith("#")
-        }
-
-AR_STOPWORDS = load_stopwords()
+        )
 
 
 def remove_stopwords(text: str) -> str:
@@ -142,7 +145,8 @@ def remove_stopwords(text: str) -> str:
         return text
 
     words = text.split()
-    filtered = [w for w in words if w not in AR_STOPWORDS]
+    stopwords = load_stopwords()
+    filtered = [w for w in words if w not in stopwords]
     return " ".join(filtered)
 
 def aggressive_normalize(text: str) -> str:
@@ -180,4 +184,86 @@ def clean_arabic_text(text: str, * , remove: bool = False, replace_light: bool =
     if stopwords:
         text = remove_stopwords(text)
     text = normalize_whitespace(text)
-    return text
\ No newline at end of file
+    return text
+
+
+# links, punctuation, tashkeel and tatweel are all deleted in one scan.
+# Tashkeel is left out of the allowed Arabic range so the punctuation class
+# catches it; tatweel counts as \w and needs its own branch. A run of deleted
+# characters never starts with "h" or "w", so links are still matched on the
+# raw text exactly like remove_links does before anything else.
+_REMOVE_RE = re.compile(
+    r"(?:[^\w\s\u0600-\u064A\u0653-\u06FF]|\u0640)+|http\S+|www\S+"
+)
+
+# remove_english runs after reduce_repeated_chars, so English runs win the
+# alternation; anything else repeated three or more times collapses to one.
+_REPEAT_OR_ENGLISH_RE = re.compile(r"[A-Za-z]+|(.)\1\1+")
+
+
+def _keep_repeated(match) -> str:
+    return match.group(1) or ""
+
+
+_LIGHT_TABLE = {
+    "إ": "ا",
+    "أ": "ا",
+    "ٱ": "ا",
+    "آ": "ا",
+    "ى": "ي",
+}
+
+_AGGRESSIVE_TABLE = {
+    "ة": "ه",
+    "ؤ": "و",
+    "ئ": "ي",
+}
+
+
+class CleaningPipeline:
+    """
+    Precompiled version of clean_arabic_text.
+
+    Built once from the flags, then called per text. Output is identical
+    to clean_arabic_text with the same flags.
+    """
+
+    def __init__(self, *, remove: bool = False, replace_light: bool = False, replace_aggressive: bool = False, stopwords: bool = False):
+        self.remove = remove
+        self.replace_light = replace_light
+        self.replace_aggressive = replace_aggressive
+        self.stopwords = load_stopwords() if stopwords else None
+
+        table = {}
+        if replace_light:
+            table.update(_LIGHT_TABLE)
+        if replace_aggressive:
+            table.update(_AGGRESSIVE_TABLE)
+        self.table = str.maketrans(table) if table else None
+
+    def __call__(self, text):
+        if not isinstance(text, str):
+            return text
+
+        if self.remove:
+            text = _REMOVE_RE.sub("", text)
+            text = " ".join(text.split())
+            text = _REPEAT_OR_ENGLISH_RE.sub(_keep_repeated, text)
+
+        if self.table is not None:
+            text = text.translate(self.table)
+
+        words = text.split()
+        if self.stopwords is not None:
+            words = [w for w in words if w not in self.stopwords]
+        return " ".join(words)
+
+    def clean_series(self, series: pd.Series) -> pd.Series:
+        """
+        Clean a whole text column with the compiled pipeline.
+        Non-string values are passed through unchanged, like __call__.
+        Mapping __call__ is faster than chaining pandas .str ops stage by
+        stage: their callable replace and split steps run per row in
+        Python anyway, and every stage copies the column.
+        """
+        return series.map(self)
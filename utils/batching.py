@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def fixed_batches(n_rows: int, batch_size: int) -> list[np.ndarray]:
+    """
+    Row indices of consecutive batch_size batches, in file order.
+    """
+    return [np.arange(start, min(start + batch_size, n_rows)) for start in range(0, n_rows, batch_size)]
+
+
+def token_budget_batches(lengths, max_tokens: int, max_rows: int | None = None) -> list[np.ndarray]:
+    """
+    Group rows by token length so that every batch, padded to its longest
+    row, holds at most max_tokens tokens.
+
+    Rows are sorted by length first, so short and long texts do not share
+    a batch. A row longer than the budget gets a batch of its own. Each
+    batch holds original row indices; scatter results back with them.
+
+    With max_rows, the sorted rows are first cut into max_rows blocks and
+    the budget only splits blocks further, so padding is never more than
+    with max_rows batches in file order.
+    """
+    lengths = np.maximum(np.asarray(lengths, dtype=np.int64), 1)
+    order = np.argsort(lengths, kind="stable")
+
+    batches, start = [], 0
+    for end in range(1, len(order) + 1):
+        # sorted ascending, so the newest row is the longest of the batch
+        if (
+            end == len(order)
+            or (max_rows and end % max_rows == 0)
+            or lengths[order[end]] * (end + 1 - start) > max_tokens
+        ):
+            batches.append(order[start:end])
+            start = end
+
+    return batches
+
+
+def padding_efficiency(lengths, batches: list[np.ndarray]) -> tuple[int, int]:
+    """
+    (real tokens, padded tokens) when every batch is padded to its longest row.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    real = int(lengths.sum())
+    padded = sum(int(lengths[batch].max()) * len(batch) for batch in batches if len(batch))
+    return real, padded
@@ -1,12 +1,16 @@
-from google import genai
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import json
+import warnings
 
 import pandas as pd
 import numpy as np
 import pickle
+from scipy import sparse
 
-from utils.arabic_text import clean_arabic_text
-from sklearn.model_selection import train_test_split
+from utils.arabic_text import clean_arabic_text, CleaningPipeline
+from utils.eda_stats import EdaStats
+from utils.embedding_store import is_embedding_store, load_embeddings
 
 
 def generate_classification_csv_gemini(
@@ -15,104 +19,534 @@ def generate_classification_csv_gemini(
     topic: str,
     api_key: str,
     output_path: str = "outputs/data/synthetic.csv",
+    **options,
+) -> dict:
+    """
+    Generate num_rows rows with Gemini as small concurrent per-class
+    requests (see SyntheticDataGenerator for the options), appending to
+    output_path and resuming an interrupted run.
+    Returns the run summary.
+    """
+    import asyncio
+
+    from utils.generation import GeminiClient, SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(
+        GeminiClient(api_key), topic, classes, num_rows, output_path, **options
+    )
+    return asyncio.run(generator.run())
+
+
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def iter_csv_batches(
+    csv_path: str,
+    columns: list[str] | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dtype: dict | None = None,
 ):
-    client = genai.Client(api_key=api_key)
+    """
+    Stream a CSV file as DataFrame chunks of at most `chunksize` rows.
 
-    prompt = f"""
-Generate {num_rows} Arabic text classification samples.
+    Only `columns` are parsed (all columns when None), in the given order,
+    so peak memory is bounded by the chunk size instead of the file size.
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
-The texts should be about: {topic}
+    available = list(pd.read_csv(csv_path, nrows=0).columns)
+    for col in columns or []:
+        if col not in available:
+            raise ValueError(
+                f"Column '{col}' not found. "
+                f"Available columns: {available}"
+            )
+
+    reader = pd.read_csv(csv_path, usecols=columns, dtype=dtype, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield chunk if columns is None else chunk[columns]
+
+
+# table formats understood by iter_batches / TableWriter / load_data
+TABLE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+FORMAT_SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def output_name(name: str, fmt: str) -> str:
+    """
+    `name` with the format's suffix added, unless it already ends with a
+    suffix of that format (x.pq stays x.pq for parquet).
+    """
+    if TABLE_FORMATS.get(Path(name).suffix.lower()) == fmt:
+        return name
+    return name + FORMAT_SUFFIXES[fmt]
 
-Output MUST be valid CSV only.
-Do NOT add explanations.
-Do NOT add markdown.
-Do NOT add extra text.
 
-CSV format exactly:
-text,label
+CLEANING_FLAGS = ("remove", "replace_light", "replace_aggressive", "stopwords")
 
-Use ONLY these labels:
-{", ".join(classes)}
-"""
 
+def cleaning_path(path) -> Path:
+    """
+    outputs/data/cleaned.csv -> outputs/data/cleaned.cleaning.json
+    """
+    return Path(path).with_suffix(".cleaning.json")
 
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-    )
 
-    csv_text = response.text.strip()
+def save_cleaning(path, flags: dict):
+    """
+    Record the cleaning flags a table (or a .pkl of its features) was
+    made with, so a model trained on it can clean new texts the same way.
+    """
+    with open(cleaning_path(path), "w", encoding="utf-8") as f:
+        json.dump({flag: bool(flags.get(flag)) for flag in CLEANING_FLAGS}, f, indent=2)
+
+
+def load_cleaning(path) -> dict | None:
+    path = cleaning_path(path)
+    if not path.is_file():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def detect_format(path: str, fmt: str | None = None) -> str:
+    """
+    Return "csv", "parquet" or "arrow": `fmt` when given, else from the suffix.
+    """
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in FORMAT_SUFFIXES:
+            raise ValueError(f"Unsupported format: {fmt}. Use one of {list(FORMAT_SUFFIXES)}")
+        return fmt
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in TABLE_FORMATS:
+        raise ValueError(
+            f"Cannot detect format of '{path}'. "
+            f"Use one of {list(TABLE_FORMATS)} or pass a format explicitly"
+        )
+    return TABLE_FORMATS[suffix]
+
+
+def table_columns(path: str, fmt: str | None = None) -> list[str]:
+    """
+    Column names of a CSV / Parquet / Arrow IPC file, without reading rows.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+
+    fmt = detect_format(path, fmt)
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names)
+
+    import pyarrow as pa
+    with pa.memory_map(str(path)) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def iter_batches(
+    path: str,
+    columns: list[str] | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dtype: dict | None = None,
+    fmt: str | None = None,
+):
+    """
+    Stream a CSV, Parquet or Arrow IPC file as DataFrame chunks.
+
+    The format comes from `fmt` or the file suffix. Only `columns` are
+    read; Parquet and Arrow skip the other columns entirely.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == "csv":
+        yield from iter_csv_batches(path, columns, chunksize, dtype)
+        return
+
+    available = table_columns(path, fmt)
+    for col in columns or []:
+        if col not in available:
+            raise ValueError(
+                f"Column '{col}' not found. "
+                f"Available columns: {available}"
+            )
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    else:
+        batches = _iter_ipc_batches(path, columns, chunksize)
+
+    for batch in batches:
+        chunk = batch.to_pandas()
+        yield chunk.astype(dtype) if dtype else chunk
+
+
+def _iter_ipc_batches(path: str, columns: list[str] | None, chunksize: int):
+    import pyarrow as pa
+
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, chunksize):
+                yield batch.slice(offset, chunksize)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(csv_text)
 
+def read_table(path: str, columns: list[str] | None = None, fmt: str | None = None) -> pd.DataFrame:
+    """
+    Read a whole CSV / Parquet / Arrow IPC file, loading only `columns`.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)[columns] if columns else pd.read_csv(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
 
 
-def load_class_distribution(csv_path: str, label_col: str,):
+def _arrow_table(chunk: pd.DataFrame):
+    """
+    Arrow table of a chunk without pandas metadata; columns with no values
+    get the null type, so a later chunk decides their real type.
     """
-    Load a CSV file and return class distribution.
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(chunk, preserve_index=False).replace_schema_metadata(None)
+    for i, name in enumerate(table.column_names):
+        if table.column(i).null_count == len(table) and len(table):
+            table = table.set_column(i, pa.field(name, pa.null()), pa.nulls(len(table)))
+    return table
+
+
+def _promote_type(a, b):
+    import pyarrow as pa
+
+    if a.equals(b) or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    try:
+        # int -> float, wider ints and the like
+        merged = pa.unify_schemas([pa.schema([("x", a)]), pa.schema([("x", b)])], promote_options="permissive")
+        return merged.field("x").type
+    except (pa.ArrowInvalid, pa.ArrowTypeError, NotImplementedError):
+        # no common type (numbers in one chunk, text in another): keep text
+        return pa.string()
+
+
+def _promote_schema(schema, other):
+    import pyarrow as pa
+
+    if schema.names != other.names:
+        raise ValueError(f"Chunk columns {other.names} differ from {schema.names}")
+    return pa.schema([
+        pa.field(field.name, _promote_type(field.type, other_field.type))
+        for field, other_field in zip(schema, other)
+    ])
+
+
+class TableWriter:
+    """
+    Write DataFrame chunks one after another to a CSV, Parquet or Arrow IPC
+    file, so the full table never has to be in memory. Used as a context
+    manager, the file is only finalized when the block succeeds; on an
+    exception the partial file is removed.
+    """
+
+    def __init__(self, path: str, fmt: str | None = None, columns: list[str] | None = None):
+        self.path = Path(path)
+        self.fmt = detect_format(path, fmt)
+        self.columns = columns
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._current = self.path
+        self._rewrites = 0
+        self._started = False
+
+    def write(self, chunk: pd.DataFrame):
+        if self.fmt == "csv":
+            chunk.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        else:
+            table = _arrow_table(chunk)
+            if self._writer is None:
+                self._open(table.schema, self.path)
+            elif not table.schema.equals(self._schema):
+                # chunks are typed one by one (a column empty in the first
+                # chunk, ints that turn into floats later): write them all
+                # under the promoted schema
+                schema = _promote_schema(self._schema, table.schema)
+                if not schema.equals(self._schema):
+                    self._rewrite(schema)
+                table = table.cast(schema)
+            self._writer.write_table(table)
+
+        self._started = True
+        self.rows += len(chunk)
+
+    def _open(self, schema, path: Path):
+        import pyarrow as pa
+
+        self._schema = schema
+        self._current = path
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._writer = pa.ipc.new_file(str(path), schema)
+
+    def _rewrite(self, schema):
+        """
+        Copy the rows written so far, batch by batch, into a new file with
+        `schema` and keep writing there; close() moves it into place.
+        Types only ever widen, so this happens at most a few times.
+        """
+        import pyarrow as pa
+
+        self._writer.close()
+        previous = self._current
+        self._rewrites += 1
+        self._open(schema, self.path.with_name(f"{self.path.name}.{self._rewrites}.tmp"))
+
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(previous).iter_batches():
+                self._writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+        else:
+            with pa.memory_map(str(previous)) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    self._writer.write_table(pa.Table.from_batches([reader.get_batch(i)]).cast(schema))
+        previous.unlink()
+
+    def close(self):
+        if not self._started:
+            self.write(pd.DataFrame(columns=self.columns or []))
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            if self._current != self.path:
+                self._current.replace(self.path)
+
+    def abort(self):
+        """
+        Close without finalizing and remove what was written.
+        """
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._writer = None
+        self._current.unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def collect_eda_stats(
+    csv_paths: str | list[str],
+    text_col: str | None = None,
+    label_col: str | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> EdaStats:
+    """
+    Single streaming pass over one or more CSV / Parquet / Arrow files.
+
+    Returns an EdaStats with class counts (when label_col is given) and
+    word/char length sketches (when text_col is given).
+    """
+    if isinstance(csv_paths, (str, Path)):
+        csv_paths = [csv_paths]
+
+    columns = [c for c in dict.fromkeys([text_col, label_col]) if c is not None]
+
+    stats = EdaStats()
+    for csv_path in csv_paths:
+        file_stats = EdaStats()
+        for chunk in iter_batches(csv_path, columns, chunksize):
+            file_stats.update(chunk, text_col=text_col, label_col=label_col)
+        stats.merge(file_stats)
+
+    return stats
+
+
+def load_class_distribution(csv_path: str, label_col: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Stream a CSV file and return class distribution.
 
     Returns:
         dict: {class_name: count}
     """
 
-    csv_path = Path(csv_path)
-    if not csv_path.exists():
-        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    return collect_eda_stats(csv_path, label_col=label_col, chunksize=chunksize).class_distribution()
 
-    df = pd.read_csv(csv_path)
 
-    if label_col not in df.columns:
-        raise ValueError(
-            f"Column '{label_col}' not found. "
-            f"Available columns: {list(df.columns)}"
-        )
 
-    class_counts = df[label_col].value_counts().to_dict()
 
-    return class_counts
+_WORKER_PIPELINE = None
+_WORKER_FLAGS = {}
 
 
-def load_text_length(csv_path: str,text_col: str):
+def _init_clean_worker(flags: dict, batch: bool):
     """
-    Load a CSV file and return text length histogram.
+    Process pool initializer: build the pipeline (and its stopword set)
+    once per worker instead of once per shard. Without batch, shards go
+    through clean_arabic_text like the single-process per-row path.
     """
-    csv_path = Path(csv_path)
-    if not csv_path.exists():
-        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    global _WORKER_PIPELINE, _WORKER_FLAGS
+    _WORKER_PIPELINE = CleaningPipeline(**flags) if batch else None
+    _WORKER_FLAGS = flags
 
-    df = pd.read_csv(csv_path)
 
-    if text_col not in df.columns:
-        raise ValueError(
-            f"Column '{text_col}' not found. "
-            f"Available columns: {list(df.columns)}"
-        )
-    texts = df[text_col].dropna().astype(str).str.strip()
+def _clean_shard(shard: pd.Series) -> pd.Series:
+    if _WORKER_PIPELINE is not None:
+        return _WORKER_PIPELINE.clean_series(shard)
+    return shard.apply(lambda x: clean_arabic_text(x, **_WORKER_FLAGS))
+
+
+def row_shards(n_rows: int, n_shards: int) -> list[tuple[int, int]]:
+    """
+    Split [0, n_rows) into at most n_shards contiguous (start, stop) ranges.
+    """
+    n_shards = max(1, min(n_shards, n_rows))
+    bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
 
-    text_counts_word = [len(t.split()) for t in texts]
-    text_counts_char = [len(t) for t in texts]
-    return text_counts_word , text_counts_char
+
+def _clean_pool(flags: dict, batch: bool, workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_clean_worker,
+        initargs=(flags, batch),
+    )
 
 
+def _clean_with_pool(column: pd.Series, pool: ProcessPoolExecutor, workers: int) -> pd.Series:
+    # a few shards per worker keeps cores busy when some shards are slower
+    shards = [column.iloc[start:stop] for start, stop in row_shards(len(column), workers * 4)]
+    return pd.concat(list(pool.map(_clean_shard, shards)))
 
 
-def clean_text_column(df: pd.DataFrame,text_col: str,*,remove: bool = False,replace_light: bool = False,replace_aggressive: bool = False,stopwords: bool = False):
+def clean_text_column(df: pd.DataFrame,text_col: str,*,remove: bool = False,replace_light: bool = False,replace_aggressive: bool = False,stopwords: bool = False,batch: bool = True,workers: int = 1):
+    """
+    Clean a text column in place.
+
+    batch=True cleans the whole column with the compiled CleaningPipeline;
+    batch=False applies clean_arabic_text row by row (reference behaviour).
+    workers > 1 splits the column into row-range shards cleaned in a process
+    pool; shards are reassembled in their original order.
+    """
     if text_col not in df.columns:
         raise ValueError(f"Column '{text_col}' not found")
 
-    df[text_col] = df[text_col].apply(
-        lambda x: clean_arabic_text(
-            x,
-            remove=remove,
-            replace_light=replace_light,
-            replace_aggressive=replace_aggressive,
-            stopwords=stopwords,
-        )
+    flags = dict(
+        remove=remove,
+        replace_light=replace_light,
+        replace_aggressive=replace_aggressive,
+        stopwords=stopwords,
     )
+
+    if workers > 1 and len(df) > 1:
+        with _clean_pool(flags, batch, workers) as pool:
+            df[text_col] = _clean_with_pool(df[text_col], pool, workers)
+        return df
+
+    if batch:
+        pipeline = CleaningPipeline(**flags)
+        df[text_col] = pipeline.clean_series(df[text_col])
+        return df
+
+    df[text_col] = df[text_col].apply(lambda x: clean_arabic_text(x, **flags))
     return df
 
 
+def iter_clean_chunks(chunks,text_col: str,*,remove: bool = False,replace_light: bool = False,replace_aggressive: bool = False,stopwords: bool = False,batch: bool = True,workers: int = 1):
+    """
+    Streaming version of clean_text_column: clean each DataFrame chunk from
+    `chunks` and yield it. The pipeline (or process pool) is built once and
+    reused for every chunk.
+    """
+    flags = dict(
+        remove=remove,
+        replace_light=replace_light,
+        replace_aggressive=replace_aggressive,
+        stopwords=stopwords,
+    )
+
+    if workers > 1:
+        with _clean_pool(flags, batch, workers) as pool:
+            for chunk in chunks:
+                if len(chunk):
+                    chunk[text_col] = _clean_with_pool(chunk[text_col], pool, workers)
+                yield chunk
+        return
+
+    pipeline = CleaningPipeline(**flags)
+    for chunk in chunks:
+        if batch:
+            chunk[text_col] = pipeline.clean_series(chunk[text_col])
+        else:
+            chunk[text_col] = chunk[text_col].apply(lambda x: clean_arabic_text(x, **flags))
+        yield chunk
+
+
+
+class TextIndex:
+    """
+    Give every distinct text an integer id, chunk by chunk.
+
+    add() returns the ids of a chunk (the inverse index), so work done on
+    `uniques` can be scattered back to all rows with `result[ids]`.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.rows = 0
+
+    def add(self, texts) -> np.ndarray:
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        chunk_ids = np.fromiter(
+            (self.ids.setdefault(t, len(self.ids)) for t in uniques),
+            dtype=np.int64,
+            count=len(uniques),
+        )
+        self.rows += len(codes)
+        return chunk_ids[codes]
+
+    @property
+    def uniques(self) -> list[str]:
+        return list(self.ids)
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows - len(self.ids)
+
 
 def text_stats(series: pd.Series) -> dict:
     texts = series.dropna().astype(str)
@@ -120,10 +554,26 @@ def text_stats(series: pd.Series) -> dict:
     return {
         "rows": len(texts),
         "avg_chars": texts.str.len().mean(),
+        "total_chars": texts.str.len().sum(),
         "total_words": texts.str.split().str.len().sum(),
     }
 
 
+def merge_text_stats(stats: list[dict]) -> dict:
+    """
+    Combine text_stats results computed on separate chunks.
+    """
+    rows = sum(s["rows"] for s in stats)
+    total_chars = sum(s["total_chars"] for s in stats)
+
+    return {
+        "rows": rows,
+        "avg_chars": total_chars / rows if rows else float("nan"),
+        "total_chars": total_chars,
+        "total_words": sum(s["total_words"] for s in stats),
+    }
+
+
 
 
 
@@ -132,9 +582,13 @@ def load_data(
     data_path: str,
     input_col: str | None,
     output_col: str,
+    fmt: str | None = None,
 ):
     """
-    Load data from CSV or PKL.
+    Load data from an embedding store, PKL, CSV, Parquet or Arrow IPC.
+    Embedding stores are memory-mapped, not copied. For other files the
+    format comes from `fmt` or the file suffix; for tables only input_col
+    and output_col are read.
     Returns X, y
     """
 
@@ -143,20 +597,32 @@ def load_data(
     if not path.exists():
         raise FileNotFoundError(f"File not found: {data_path}")
 
+    # embedding store directory
+    if is_embedding_store(path):
+        X, y, _ = load_embeddings(path)
+
     # PKL
-    if path.suffix == ".pkl":
+    elif (fmt or path.suffix.lstrip(".")).lower() == "pkl":
         with open(path, "rb") as f:
             data = pickle.load(f)
 
-        X = np.array(data["X"])
-        y = np.array(data["y"])
+        # TF-IDF pickles hold a sparse matrix; np.array would wrap it in a
+        # 0-d object array, so keep it as CSR
+        X = data["X"]
+        X = X.tocsr() if sparse.issparse(X) else np.asarray(X)
+        y = np.asarray(data["y"])
+
+    # CSV / Parquet / Arrow
+    else:
+        try:
+            fmt = detect_format(path, fmt)
+        except ValueError:
+            raise ValueError("Only CSV, Parquet, Arrow or PKL supported")
 
-    # CSV
-    elif path.suffix == ".csv":
         if input_col is None:
-            raise ValueError("input_col is required for CSV")
+            raise ValueError(f"input_col is required for {fmt}")
 
-        df = pd.read_csv(path)
+        df = read_table(path, [input_col, output_col], fmt)
 
         X = df[input_col].tolist()
         y = df[output_col].values
@@ -167,20 +633,111 @@ def load_data(
 
         X = np.array(X)
 
-    else:
-        raise ValueError("Only CSV or PKL supported")
-
     return X, y
 
 
-def split_data(X, y, test_size=0.2):
+def load_groups(path: str, group_col: str = "group", n_rows: int | None = None) -> np.ndarray:
     """
-    Split data into train/test
+    Group ids for a group-aware split, one per row of the training
+    data, read from a table such as the output of `text dedup --mode group`.
+    """
+    groups = read_table(path, [group_col])[group_col].to_numpy()
+    if n_rows is not None and len(groups) != n_rows:
+        raise ValueError(f"{path} has {len(groups)} group ids for {n_rows} rows of data")
+    return groups
+
+
+def group_split(y, groups, test_size=0.2):
+    """
+    Train/test row indices that keep every group on one side, so near
+    duplicates (see `text dedup --mode group`) cannot leak from train
+    into test. Labels stay stratified as far as the groups allow.
+
+    The test side is one of round(1 / test_size) group folds, so it gets
+    about 1 / round(1 / test_size) of the rows: 0.2 and 0.25 are exact,
+    0.3 becomes 1/3 and 0.4 becomes 1/2. Large groups shift it further.
+    A warning gives the actual fraction when it is off by more than 1%.
+    Returns train_idx, test_idx
+    """
+    from sklearn.model_selection import StratifiedGroupKFold
+
+    n_splits = max(2, round(1 / test_size))
+    splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=42)
+    train_idx, test_idx = next(splitter.split(np.zeros(len(y)), y, groups))
+
+    actual = len(test_idx) / max(len(y), 1)
+    if abs(actual - test_size) > 0.01:
+        warnings.warn(
+            f"Group split puts {actual:.1%} of rows in the test side, not {test_size:.1%}: "
+            f"groups are split into {n_splits} folds and one of them is the test side",
+            stacklevel=2,
+        )
+    return train_idx, test_idx
+
+
+def split_indices(y, test_size=0.2, groups=None):
+    """
+    Train/test row indices of split_data, to slice several arrays of the
+    same rows (features, groups, a reference store) with one split.
+    Returns train_idx, test_idx
     """
+    if groups is not None:
+        return group_split(y, groups, test_size)
+
+    from sklearn.model_selection import train_test_split
+
     return train_test_split(
-        X,
-        y,
+        np.arange(len(y)),
         test_size=test_size,
         stratify=y,
         random_state=42,
     )
+
+
+def split_data(X, y, test_size=0.2, groups=None):
+    """
+    Split data into train/test
+    Works on dense arrays and scipy sparse matrices alike.
+    With `groups`, rows of one group never end up on both sides.
+    """
+    train_idx, test_idx = split_indices(y, test_size, groups)
+    y = np.asarray(y)
+    return X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+
+def densify(X, max_gb: float = 4.0, chunk_rows: int = 10_000) -> np.ndarray:
+    """
+    Turn a sparse matrix into a dense float32 array, chunk by chunk.
+
+    Refuses when the dense result would exceed `max_gb`, instead of
+    letting .toarray() exhaust memory.
+    """
+    if not sparse.issparse(X):
+        return X
+
+    n_rows, n_cols = X.shape
+    size_gb = n_rows * n_cols * 4 / (1024 ** 3)
+    if size_gb > max_gb:
+        raise MemoryError(
+            f"Dense matrix would need {size_gb:.1f} GB (limit {max_gb} GB). "
+            "Reduce features with --svd-components or raise --max-dense-gb."
+        )
+
+    X = X.tocsr()
+    dense = np.empty((n_rows, n_cols), dtype=np.float32)
+    for start in range(0, n_rows, chunk_rows):
+        dense[start:start + chunk_rows] = X[start:start + chunk_rows].toarray()
+    return dense
+
+
+def reduce_sparse(X_train, X_test, n_components: int):
+    """
+    Fit TruncatedSVD on the sparse training features and project both
+    splits to `n_components` dense columns.
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    svd = TruncatedSVD(n_components=n_components, random_state=42)
+    X_train = svd.fit_transform(X_train).astype(np.float32)
+    X_test = svd.transform(X_test).astype(np.float32)
+    return X_train, X_test, svd
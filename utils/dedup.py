@@ -0,0 +1,245 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+SHINGLE_MODES = ("char", "word")
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# size of the (shingles x permutations) block hashed at once; a block
+# that stays in cache is several times faster than one large matrix
+_BLOCK_BYTES = 1 << 20
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """
+    Bijective 64-bit mixer, so similar inputs give unrelated hashes.
+    """
+    with np.errstate(over="ignore"):
+        x = x + _MIX
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _tokens(texts: list[str], mode: str, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Flat uint64 token ids of all texts (characters or words) and the
+    number of tokens per text. Texts shorter than k are padded, so every
+    text has at least one shingle (all empty texts then match).
+    """
+    if mode == "char":
+        texts = [" ".join(text.split()).ljust(k, "\0") for text in texts]
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+        return codes.astype(np.uint64), lengths
+
+    words = [text.split() for text in texts]
+    words = [w + [""] * (k - len(w)) if len(w) < k else w for w in words]
+    lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+    flat = np.array([word for w in words for word in w], dtype=object)
+    return pd.util.hash_array(flat), lengths
+
+
+def shingle_hashes(texts: list[str], mode: str = "char", k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    64-bit hashes of every k-gram of tokens, computed for all texts at
+    once on the concatenated token array.
+    Returns hashes and the number of shingles per text.
+    """
+    tokens, lengths = _tokens(texts, mode, k)
+    counts = lengths - k + 1
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    # start position of each window inside the flat token array
+    positions = np.repeat(starts, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    h = np.zeros(len(positions), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            h = h * _MIX + tokens[positions + j]
+    return _splitmix64(h), counts
+
+
+class MinHasher:
+    """
+    MinHash signatures with multiply-shift hash functions
+    h_i(x) = (a_i * x + b_i) >> 32 over 32-bit shingle hashes, and LSH
+    band keys (one 64-bit key per band of `rows` signature values).
+    Only the first bands * rows of the num_perm functions are computed;
+    rows defaults to num_perm // bands.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 0, rows: int | None = None):
+        rows = rows or num_perm // bands
+        if not 1 <= bands * rows <= num_perm:
+            raise ValueError("bands * rows must be between 1 and num_perm")
+        rng = np.random.default_rng(seed)
+        self.num_perm = bands * rows
+        self.bands = bands
+        self.rows = rows
+        # drawn for all num_perm functions, so a given seed keeps its functions whatever rows is
+        self.a = (rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1))[:self.num_perm]
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)[:self.num_perm]
+        self.band_mix = rng.integers(1, 2 ** 63, self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def signatures(self, hashes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        (texts, bands * rows) uint32 minimum over each text's shingles.
+        """
+        x = hashes >> np.uint64(32)
+        doc_ends = np.cumsum(counts)
+        signatures = np.empty((len(counts), self.num_perm), dtype=np.uint32)
+        block_size = max(1, _BLOCK_BYTES // (8 * self.num_perm))
+        buffer = np.empty((block_size, self.num_perm), dtype=np.uint64)
+
+        first = 0
+        while first < len(counts):
+            # whole texts per block, at least one
+            shingle_start = doc_ends[first] - counts[first]
+            last = max(first + 1, int(np.searchsorted(doc_ends, shingle_start + block_size, side="right")))
+            block = x[shingle_start:doc_ends[last - 1]]
+            values = buffer[:len(block)] if len(block) <= block_size else np.empty((len(block), self.num_perm), dtype=np.uint64)
+            np.multiply(block[:, None], self.a, out=values)
+            values += self.b
+            values >>= np.uint64(32)
+            offsets = np.concatenate([[0], np.cumsum(counts[first:last])[:-1]])
+            signatures[first:last] = np.minimum.reduceat(values, offsets, axis=0)
+            first = last
+        return signatures
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        (texts, bands) uint64: texts share a key in a band when their
+        signatures agree on all of that band's rows.
+        """
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            keys = (banded * self.band_mix).sum(axis=2, dtype=np.uint64)
+        return _splitmix64(keys)
+
+
+_WORKER_HASHER = None
+
+
+def _init_dedup_worker(mode: str, k: int, num_perm: int, bands: int, seed: int, rows: int | None = None):
+    """
+    Process pool initializer: the hasher is rebuilt from its seed, so
+    every worker uses the same permutations.
+    """
+    global _WORKER_HASHER
+    _WORKER_HASHER = (mode, k, MinHasher(num_perm, bands, seed, rows))
+
+
+def _band_keys_shard(texts: list[str]) -> np.ndarray:
+    mode, k, hasher = _WORKER_HASHER
+    if not texts:
+        return np.empty((0, hasher.bands), dtype=np.uint64)
+    return hasher.band_keys(hasher.signatures(*shingle_hashes(texts, mode, k)))
+
+
+def iter_band_keys(text_chunks, mode: str = "char", k: int = 5, num_perm: int = 128,
+                   bands: int = 16, seed: int = 0, workers: int = 1, rows: int | None = None):
+    """
+    LSH band keys of each chunk of texts, in order. With workers > 1
+    every chunk is split into shards hashed by a process pool.
+    """
+    from utils.data_handler import row_shards
+
+    if workers <= 1:
+        _init_dedup_worker(mode, k, num_perm, bands, seed, rows)
+        for texts in text_chunks:
+            yield _band_keys_shard(texts)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_dedup_worker,
+        initargs=(mode, k, num_perm, bands, seed, rows),
+    ) as pool:
+        for texts in text_chunks:
+            if not texts:
+                yield np.empty((0, bands), dtype=np.uint64)
+                continue
+            # a few shards per worker keeps cores busy when some shards are slower
+            shards = [texts[start:stop] for start, stop in row_shards(len(texts), workers * 4)]
+            yield np.concatenate(list(pool.map(_band_keys_shard, shards)))
+
+
+def lsh_params(threshold: float, num_perm: int, false_negative_weight: float = 2.0) -> tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm that minimise the false
+    positive area plus false_negative_weight times the false negative
+    area of the LSH S-curve p(s) = 1 - (1 - s^rows)^bands around the
+    Jaccard threshold. Only curves that reach p = 0.5 at or below the
+    threshold qualify, so pairs at the threshold are found more often
+    than not; a missed duplicate costs more than a verified candidate.
+    """
+    s = np.linspace(0, 1, 1001)
+    step = s[1] - s[0]
+    below = s <= threshold
+    best, best_error = None, np.inf
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            if (1 - 0.5 ** (1 / bands)) ** (1 / rows) > threshold:
+                continue
+            p = 1 - (1 - s ** rows) ** bands
+            error = (p[below].sum() + false_negative_weight * (1 - p[~below]).sum()) * step
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+def lsh_clusters(band_keys: np.ndarray) -> np.ndarray:
+    """
+    Cluster id per text: connected components of "shares a band key".
+    Per band, texts with equal keys are linked to the first of them,
+    found by sorting, so the cost is O(n log n) per band, not O(n^2).
+    Ids are numbered in order of each cluster's first text.
+    """
+    n = len(band_keys)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    sources, targets = [], []
+    for band in range(band_keys.shape[1]):
+        keys = band_keys[:, band]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        new_run = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        run_first = order[np.maximum.accumulate(np.where(new_run, np.arange(n), 0))]
+        sources.append(order[~new_run])
+        targets.append(run_first[~new_run])
+
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    graph = sparse.coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    # renumber by first occurrence
+    _, first = np.unique(labels, return_index=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[labels]
+
+
+def cluster_stats(clusters: np.ndarray) -> dict:
+    sizes = np.bincount(clusters)
+    duplicated = sizes[sizes > 1]
+    return {
+        "rows": int(len(clusters)),
+        "clusters": int(len(sizes)),
+        "duplicate_clusters": int(len(duplicated)),
+        "rows_in_duplicate_clusters": int(duplicated.sum()),
+        "removable_rows": int(len(clusters) - len(sizes)),
+        "largest_cluster": int(sizes.max()) if len(sizes) else 0,
+        "size_histogram": {
+            "2": int((duplicated == 2).sum()),
+            "3-5": int(((duplicated >= 3) & (duplicated <= 5)).sum()),
+            "6-20": int(((duplicated >= 6) & (duplicated <= 20)).sum()),
+            "21+": int((duplicated > 20).sum()),
+        },
+    }
@@ -0,0 +1,188 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+class RunningMoments:
+    """
+    Streaming count / mean / variance (Welford, merged with Chan's formula).
+    Two instances built on different shards can be merged exactly.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return self
+
+        batch = RunningMoments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        return self.merge(batch)
+
+    def merge(self, other: "RunningMoments"):
+        if other.count == 0:
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        return self
+
+    @property
+    def std(self) -> float:
+        """
+        Population standard deviation, same as np.std.
+        """
+        return (self.m2 / self.count) ** 0.5 if self.count else float("nan")
+
+
+class LengthHistogram:
+    """
+    Sketch of non-negative integer lengths (words or chars per text).
+
+    Lengths are integers, so one counter per length value is an exact
+    fixed-bin sketch: memory depends on the longest text, not on the
+    number of rows, and quantiles come out exact.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.moments = RunningMoments()
+
+    def update(self, lengths):
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if len(lengths) == 0:
+            return self
+
+        self._add_counts(np.bincount(lengths))
+        self.moments.update(lengths)
+        return self
+
+    def merge(self, other: "LengthHistogram"):
+        self._add_counts(other.counts)
+        self.moments.merge(other.moments)
+        return self
+
+    def _add_counts(self, counts: np.ndarray):
+        if len(counts) > len(self.counts):
+            self.counts = np.pad(self.counts, (0, len(counts) - len(self.counts)))
+        self.counts[:len(counts)] += counts
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Distinct lengths seen, to be plotted with `weights`.
+        """
+        return np.flatnonzero(self.counts)
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self.counts[self.values]
+
+    def _value_at(self, rank: int) -> int:
+        # value of the rank-th element (0-based) of the sorted lengths
+        return int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+
+    def quantile(self, q: float) -> float:
+        """
+        Same result as np.quantile (linear interpolation) on the raw lengths.
+        """
+        if self.count == 0:
+            return float("nan")
+
+        pos = q * (self.count - 1)
+        lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+        lo_value, hi_value = self._value_at(lo), self._value_at(hi)
+        return lo_value + (hi_value - lo_value) * (pos - lo)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.moments.mean if self.count else float("nan"),
+            "median": self.quantile(0.5),
+            "std": self.moments.std,
+        }
+
+    def bin_edges(self, bins) -> np.ndarray:
+        """
+        Histogram bin edges for "auto", "sturges", "fd" or a number of bins,
+        matching np.histogram_bin_edges (numpy 1.26) on the raw lengths.
+        """
+        if self.count == 0:
+            return np.array([0.0, 1.0])
+
+        values = self.values
+        first, last = float(values[0]), float(values[-1])
+        ptp = last - first
+        if first == last:
+            first, last = first - 0.5, last + 0.5
+
+        if isinstance(bins, str) and bins.isdigit():
+            bins = int(bins)
+
+        if isinstance(bins, int):
+            return np.linspace(first, last, bins + 1)
+
+        sturges = ptp / (np.log2(self.count) + 1.0)
+        fd = 2.0 * (self.quantile(0.75) - self.quantile(0.25)) * self.count ** (-1.0 / 3.0)
+
+        if bins == "sturges":
+            width = sturges
+        elif bins == "fd":
+            width = fd
+        elif bins == "auto":
+            width = min(fd, sturges) if fd else sturges
+        else:
+            raise ValueError("bins must be 'auto', 'sturges', 'fd' or a number")
+
+        n_bins = int(np.ceil((last - first) / width)) if width else 1
+        return np.linspace(first, last, n_bins + 1)
+
+
+class EdaStats:
+    """
+    Everything the EDA commands need, collected in one pass over the data:
+    class counts plus word and char length sketches. Mergeable across
+    chunks, files or processes.
+    """
+
+    def __init__(self):
+        self.class_counts = Counter()
+        self.words = LengthHistogram()
+        self.chars = LengthHistogram()
+
+    def update(self, chunk: pd.DataFrame, text_col: str | None = None, label_col: str | None = None):
+        if label_col is not None:
+            self.class_counts.update(chunk[label_col].value_counts().to_dict())
+
+        if text_col is not None:
+            texts = chunk[text_col].dropna().astype(str).str.strip()
+            self.words.update(texts.str.split().str.len().to_numpy())
+            self.chars.update(texts.str.len().to_numpy())
+
+        return self
+
+    def merge(self, other: "EdaStats"):
+        self.class_counts.update(other.class_counts)
+        self.words.merge(other.words)
+        self.chars.merge(other.chars)
+        return self
+
+    def class_distribution(self) -> dict:
+        """
+        {class_name: count}, most frequent first.
+        """
+        return dict(self.class_counts.most_common())
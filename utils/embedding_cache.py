@@ -0,0 +1,159 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_CACHE_PATH = Path("outputs/embeddings/cache.sqlite")
+
+# SQLite caps the number of bound parameters per statement
+_QUERY_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    Persistent text -> vector cache in a single SQLite file.
+
+    Keys hash (model name, engine, model revision, normalization flag,
+    text), so the same text encoded by another model, another version of
+    it or without normalization never collides.
+    The stored vectors are bounded by `max_mb`; least recently used ones
+    are evicted first and the freed pages are returned to the file system.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, *, model_name: str, normalized: bool,
+                 engine: str = "native", revision: str = "", max_mb: float = 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.namespace = f"{model_name}\0{engine}\0{revision}\0{int(normalized)}\0"
+        self.max_bytes = int(max_mb * 1024 ** 2)
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        self.conn = sqlite3.connect(self.path)
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # incremental mode lets eviction shrink the file; VACUUM applies
+            # it to a file created without it
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)")
+
+        # scanned once; put_many and evict keep it up to date
+        total = self.conn.execute("SELECT SUM(LENGTH(vector)) FROM embeddings").fetchone()[0]
+        self._size = total or 0
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b((self.namespace + text).encode("utf-8"), digest_size=16).digest()
+
+    def lookup(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """
+        Cached vectors for `keys`. Missing keys are simply absent from the
+        result; found ones are marked as recently used.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+
+        for start in range(0, len(keys), _QUERY_BATCH):
+            batch = keys[start:start + _QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                ((now, key) for key, _ in rows),
+            )
+
+        self.conn.commit()
+        return found
+
+    def put_many(self, texts: list[str], vectors: np.ndarray):
+        now = time.time()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # a key already present holds the same vector, so it is kept as is
+        cursor = self.conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            ((self.key(t), v.tobytes(), now) for t, v in zip(texts, vectors)),
+        )
+        self.conn.commit()
+        if len(vectors):
+            self._size += cursor.rowcount * vectors[0].nbytes
+        self.evict()
+
+    def size_bytes(self) -> int:
+        return self._size
+
+    def evict(self):
+        """
+        Drop least recently used vectors until the cache fits in max_bytes.
+        """
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+
+        freed, victims = 0, []
+        for key, size in self.conn.execute(
+            "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        self.conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self.conn.commit()
+        # execute() runs only the first step of the pragma (one page);
+        # executescript() runs it to the end
+        self.conn.executescript("PRAGMA incremental_vacuum;")
+        self._size -= freed
+        self.evicted += len(victims)
+
+    def encode(self, texts: list[str], encode_fn) -> np.ndarray:
+        """
+        Encode `texts` with `encode_fn`, calling it only for cache misses,
+        and return vectors in the order of `texts`.
+        """
+        keys = [self.key(t) for t in texts]
+        cached = self.lookup(keys)
+
+        missing = [t for t, k in zip(texts, keys) if k not in cached]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            unique_missing = list(dict.fromkeys(missing))
+            new_vectors = np.asarray(encode_fn(unique_missing), dtype=np.float32)
+            self.put_many(unique_missing, new_vectors)
+            for text, vector in zip(unique_missing, new_vectors):
+                cached[self.key(text)] = vector
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([cached[k] for k in keys])
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,377 @@
+import json
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+
+STORE_SUFFIX = ".emb"
+MANIFEST = "manifest.json"
+SCALES = "scales.npy"
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+
+def is_embedding_store(path) -> bool:
+    return (Path(path) / MANIFEST).is_file()
+
+
+def _labels_array(y) -> np.ndarray:
+    y = np.asarray(y)
+    # object arrays need pickle to be saved; store labels as fixed-width text
+    if y.dtype == object:
+        y = y.astype(str)
+    return y
+
+
+def int8_scales(absmax: np.ndarray) -> np.ndarray:
+    """
+    Per-column scale mapping [-absmax, absmax] onto [-127, 127].
+    """
+    absmax = np.asarray(absmax, dtype=np.float32)
+    return np.where(absmax > 0, absmax / 127, 1).astype(np.float32)
+
+
+def quantize_int8(X, scales) -> np.ndarray:
+    return np.clip(np.rint(np.asarray(X, dtype=np.float32) / scales), -127, 127).astype(np.int8)
+
+
+def _remove_partial(path: Path, files: list, names: tuple):
+    """
+    Close the open files of an aborted writer and delete what it wrote;
+    the directory goes too when nothing else is left in it.
+    """
+    for f in files:
+        f.close()
+    for name in names + (MANIFEST, "y.npy", SCALES):
+        (path / name).unlink(missing_ok=True)
+    try:
+        path.rmdir()
+    except OSError:
+        pass
+
+
+class QuantizedArray:
+    """
+    Read-only int8 matrix with per-column scales.
+
+    Indexing dequantizes only the selected rows to float32, so splitting a
+    memory-mapped store never builds the full float32 matrix.
+    """
+
+    dtype = np.dtype(np.float32)
+    ndim = 2
+
+    def __init__(self, codes, scales):
+        self.codes = codes
+        self.scales = np.asarray(scales, dtype=np.float32)
+
+    @property
+    def shape(self) -> tuple:
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        rows, cols = key, slice(None)
+        if isinstance(key, tuple):
+            rows, cols = (key + (slice(None),))[:2]
+        if cols is Ellipsis:
+            cols = slice(None)
+        return self.codes[rows, cols].astype(np.float32) * self.scales[cols]
+
+    def __array__(self, dtype=None, copy=None):
+        out = np.empty(self.shape, dtype=np.float32)
+        for start in range(0, len(self), 10_000):
+            out[start:start + 10_000] = self[start:start + 10_000]
+        return out if dtype is None else out.astype(dtype)
+
+
+class EmbeddingWriter:
+    """
+    Write a dense embedding store chunk by chunk.
+
+    Layout of the store directory:
+        manifest.json   kind, shape, dtype, extra metadata
+        X.bin           row-major matrix, opened later with np.memmap
+        y.npy           labels
+
+        scales.npy      per-column scales, int8 stores only
+
+    Rows are appended to X.bin as they come, so the full matrix is never
+    held in memory while writing. int8 scales depend on every row, so
+    int8 rows are spooled as float32 and quantized when the writer closes.
+    """
+
+    def __init__(self, path, dtype=np.float32, meta: dict | None = None):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.meta = meta or {}
+        self.rows = 0
+        self.dim = None
+        self._labels = []
+
+        self.quantized = self.dtype == np.int8
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        # the store only becomes valid again when close() writes the manifest
+        (self.path / MANIFEST).unlink(missing_ok=True)
+        self._file = open(self.path / ("X.f32.tmp" if self.quantized else "X.bin"), "wb")
+
+    def append(self, X, y):
+        X = np.ascontiguousarray(X, dtype=np.float32 if self.quantized else self.dtype)
+        if self.dim is None:
+            self.dim = X.shape[1]
+        elif X.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim} columns, got {X.shape[1]}")
+
+        self._file.write(X.tobytes())
+        self._labels.append(_labels_array(y))
+        self.rows += len(X)
+
+    def _quantize(self, chunk_rows: int = 10_000):
+        spool = self.path / "X.f32.tmp"
+        shape = (self.rows, self.dim or 0)
+
+        if self.rows:
+            X = np.memmap(spool, dtype=np.float32, mode="r", shape=shape)
+            absmax = np.zeros(shape[1], dtype=np.float32)
+            for start in range(0, self.rows, chunk_rows):
+                absmax = np.maximum(absmax, np.abs(X[start:start + chunk_rows]).max(axis=0))
+            scales = int8_scales(absmax)
+
+            with open(self.path / "X.bin", "wb") as f:
+                for start in range(0, self.rows, chunk_rows):
+                    f.write(quantize_int8(X[start:start + chunk_rows], scales).tobytes())
+            del X
+        else:
+            scales = int8_scales(np.zeros(shape[1]))
+            open(self.path / "X.bin", "wb").close()
+
+        np.save(self.path / SCALES, scales)
+        spool.unlink()
+
+    def close(self):
+        self._file.close()
+        if self.quantized:
+            self._quantize()
+
+        y = np.concatenate(self._labels) if self._labels else np.array([])
+        np.save(self.path / "y.npy", _labels_array(y))
+
+        manifest = {
+            "kind": "dense",
+            "shape": [self.rows, self.dim or 0],
+            "dtype": self.dtype.name,
+            "meta": self.meta,
+        }
+        with open(self.path / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def abort(self):
+        _remove_partial(self.path, [self._file], ("X.bin", "X.f32.tmp"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # a failed run must not leave a store that looks complete
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SparseEmbeddingWriter:
+    """
+    Write a CSR embedding store chunk by chunk.
+
+    Each chunk's values and column indices are appended to X_data.bin and
+    X_indices.bin; row pointers are kept (one int per row) and saved as
+    X_indptr.npy on close. The whole matrix never has to be in memory.
+    """
+
+    def __init__(self, path, n_features: int, dtype=np.float64, meta: dict | None = None):
+        self.path = Path(path)
+        self.n_features = n_features
+        self.dtype = np.dtype(dtype)
+        self.meta = meta or {}
+        self.rows = 0
+        self.nnz = 0
+        self._indptr = [np.zeros(1, dtype=np.int64)]
+        self._labels = []
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / MANIFEST).unlink(missing_ok=True)
+        self._data = open(self.path / "X_data.bin", "wb")
+        self._indices = open(self.path / "X_indices.bin", "wb")
+
+    def append(self, X, y):
+        X = sparse.csr_matrix(X)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} columns, got {X.shape[1]}")
+
+        self._data.write(X.data.astype(self.dtype, copy=False).tobytes())
+        self._indices.write(X.indices.astype(np.int32, copy=False).tobytes())
+        self._indptr.append(X.indptr[1:].astype(np.int64) + self.nnz)
+        self._labels.append(_labels_array(y))
+        self.rows += X.shape[0]
+        self.nnz += X.nnz
+
+    def close(self):
+        self._data.close()
+        self._indices.close()
+
+        indptr = np.concatenate(self._indptr)
+        # scipy upcasts int32 indices when indptr is int64, so stay int32 when possible
+        np.save(self.path / "X_indptr.npy", indptr.astype(np.int32) if self.nnz < 2 ** 31 else indptr)
+
+        y = np.concatenate(self._labels) if self._labels else np.array([])
+        np.save(self.path / "y.npy", _labels_array(y))
+
+        manifest = {
+            "kind": "csr",
+            "layout": "bin",
+            "shape": [self.rows, self.n_features],
+            "nnz": self.nnz,
+            "dtype": self.dtype.name,
+            "meta": self.meta,
+        }
+        with open(self.path / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def abort(self):
+        _remove_partial(self.path, [self._data, self._indices], ("X_data.bin", "X_indices.bin", "X_indptr.npy"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # a failed run must not leave a store that looks complete
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_embeddings(path, X, y, meta: dict | None = None, dtype=None) -> Path:
+    """
+    Save a dense array or a scipy sparse matrix as an embedding store,
+    as `dtype` (float32, float16 or int8; default: X.dtype).
+
+    Sparse matrices are stored as CSR component arrays (X_data.npy,
+    X_indices.npy, X_indptr.npy) so they open without densifying; int8
+    quantizes the stored values with one scale per column.
+    """
+    path = Path(path)
+    dtype = np.dtype(X.dtype if dtype is None else dtype)
+
+    if not sparse.issparse(X):
+        with EmbeddingWriter(path, dtype=dtype, meta=meta) as writer:
+            writer.append(X, y)
+        return path
+
+    X = sparse.csr_matrix(X)
+    path.mkdir(parents=True, exist_ok=True)
+
+    if dtype == np.int8:
+        scales = int8_scales(abs(X).max(axis=0).toarray().ravel())
+        data = quantize_int8(X.data, scales[X.indices])
+        np.save(path / SCALES, scales)
+    else:
+        data = X.data.astype(dtype, copy=False)
+
+    np.save(path / "X_data.npy", data)
+    np.save(path / "X_indices.npy", X.indices)
+    np.save(path / "X_indptr.npy", X.indptr)
+    np.save(path / "y.npy", _labels_array(y))
+
+    manifest = {
+        "kind": "csr",
+        "shape": list(X.shape),
+        "dtype": dtype.name,
+        "meta": meta or {},
+    }
+    with open(path / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return path
+
+
+def load_manifest(path) -> dict:
+    with open(Path(path) / MANIFEST, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_csr_arrays(path: Path, manifest: dict, mode) -> tuple[np.ndarray, np.ndarray]:
+    if manifest.get("layout") != "bin":
+        return np.load(path / "X_data.npy", mmap_mode=mode), np.load(path / "X_indices.npy", mmap_mode=mode)
+
+    # raw files written by SparseEmbeddingWriter
+    nnz = manifest["nnz"]
+    if mode is None or nnz == 0:
+        return (
+            np.fromfile(path / "X_data.bin", dtype=manifest["dtype"]),
+            np.fromfile(path / "X_indices.bin", dtype=np.int32),
+        )
+    return (
+        np.memmap(path / "X_data.bin", dtype=manifest["dtype"], mode="r", shape=(nnz,)),
+        np.memmap(path / "X_indices.bin", dtype=np.int32, mode="r", shape=(nnz,)),
+    )
+
+
+def load_embeddings(path, mmap: bool = True):
+    """
+    Open an embedding store. Returns X, y, manifest.
+
+    With mmap=True nothing is copied: dense X is an np.memmap and the CSR
+    components are memory-mapped .npy arrays. Dense float16 stores are
+    returned as float16, CSR float16 values as float32. Dense int8
+    stores come back as a QuantizedArray that dequantizes rows when they
+    are indexed; int8 CSR values are dequantized to float32 on load.
+    """
+    path = Path(path)
+    manifest = load_manifest(path)
+    mode = "r" if mmap else None
+    shape = tuple(manifest["shape"])
+    quantized = manifest["dtype"] == "int8"
+
+    y = np.load(path / "y.npy", mmap_mode=mode)
+
+    if manifest["kind"] == "dense":
+        if mmap and shape[0] > 0:
+            X = np.memmap(path / "X.bin", dtype=manifest["dtype"], mode="r", shape=shape)
+        else:
+            X = np.fromfile(path / "X.bin", dtype=manifest["dtype"]).reshape(shape)
+        if quantized:
+            X = QuantizedArray(X, np.load(path / SCALES))
+
+    elif manifest["kind"] == "csr":
+        data, indices = _load_csr_arrays(path, manifest, mode)
+        if quantized:
+            data = data.astype(np.float32) * np.load(path / SCALES)[indices]
+        elif data.dtype == np.float16:
+            # scipy sparse cannot index or multiply float16 matrices
+            data = data.astype(np.float32)
+
+        X = sparse.csr_matrix(
+            (
+                data,
+                indices,
+                np.load(path / "X_indptr.npy", mmap_mode=mode),
+            ),
+            shape=shape,
+        )
+
+    else:
+        raise ValueError(f"Unknown embedding store kind: {manifest['kind']}")
+
+    return X, y, manifest
+
+
+def store_size_mb(path) -> float:
+    return sum(f.stat().st_size for f in Path(path).iterdir()) / (1024 ** 2)
@@ -0,0 +1,150 @@
+import json
+import pickle
+import shutil
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from utils.data_handler import load_cleaning
+from utils.embedding_store import SCALES, is_embedding_store, load_manifest, quantize_int8
+from utils.sentence_encoder import load_sentence_encoder
+from utils.tfidf import load_tfidf
+
+
+def feature_config(data_path) -> dict | None:
+    """
+    How the features in data_path were made, so the same transform can
+    be applied to new texts: a saved TF-IDF vectorizer or a Model2Vec
+    encoder, plus the storage dtype and the cleaning flags of the texts
+    (`text preprocess`). None if it cannot be told from the data (e.g. a
+    model2vec .pkl).
+    """
+    path = Path(data_path)
+
+    if is_embedding_store(path):
+        manifest = load_manifest(path)
+        meta = manifest.get("meta", {})
+        config = {"store": str(path), "dtype": manifest["dtype"], "cleaning": meta.get("cleaning")}
+
+        if (path / "tfidf.json").is_file():
+            return {**config, "method": "tfidf", "vectorizer": str(path)}
+        if meta.get("method") == "tfidf-transform":
+            return {**config, "method": "tfidf", "vectorizer": meta["vectorizer"]}
+        if meta.get("method") == "model2vec":
+            return {**config, "method": "model2vec", "model": meta["model"], "engine": meta.get("engine", "native")}
+        return None
+
+    # .pkl written by `embd tfidf`, vectorizer saved next to it
+    if (path.with_suffix(".tfidf") / "tfidf.json").is_file():
+        return {"method": "tfidf", "vectorizer": str(path.with_suffix(".tfidf")), "cleaning": load_cleaning(path)}
+    return None
+
+
+def config_path(model_path) -> Path:
+    """
+    outputs/models/best.pkl -> outputs/models/best.features.json
+    """
+    return Path(model_path).with_suffix(".features.json")
+
+
+def save_feature_config(model_path, config: dict | None, svd=None):
+    """
+    Write the feature config next to a saved model. A fitted SVD
+    (--svd-components) is pickled beside it and referenced by path, and
+    the int8 scales of the training store are copied beside it, so the
+    model keeps working when the store is moved or deleted.
+    """
+    config = dict(config or {})
+    if config.get("dtype") == "int8" and config.get("store"):
+        scales_path = Path(model_path).with_suffix(".scales.npy")
+        shutil.copyfile(Path(config["store"]) / SCALES, scales_path)
+        config["scales"] = str(scales_path)
+
+    if svd is not None:
+        svd_path = Path(model_path).with_suffix(".svd.pkl")
+        with open(svd_path, "wb") as f:
+            pickle.dump(svd, f)
+        config["svd"] = str(svd_path)
+
+    with open(config_path(model_path), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_feature_config(model_path) -> dict:
+    path = config_path(model_path)
+    if not path.is_file():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Featurizer:
+    """
+    Texts -> the features a model was trained on, one batch at a time.
+
+    Applies the saved TF-IDF vectorizer or the Model2Vec encoder, rounds
+    the values the way the training store held them (float16, or int8
+    with the store's scales), then the SVD projection if there was one,
+    so predictions see the same inputs as training.
+    """
+
+    def __init__(self, config: dict, batch_size: int = 32, max_tokens: int = 16384, workers: int = 1):
+        self.config = config
+        self.encoder = None
+        self.vectorizer = None
+        self.svd = None
+        self.scales = None
+
+        method = config.get("method")
+        if method == "tfidf":
+            self.vectorizer = load_tfidf(config["vectorizer"])
+        elif method == "model2vec":
+            self.encoder = load_sentence_encoder(
+                config["model"], config.get("engine", "native"),
+                batch_size=batch_size, max_tokens=max_tokens, workers=workers,
+            )
+        else:
+            raise ValueError(f"Unknown feature method: {method}")
+
+        if config.get("svd"):
+            with open(config["svd"], "rb") as f:
+                self.svd = pickle.load(f)
+
+        self.dtype = config.get("dtype")
+        if self.dtype == "int8":
+            # models saved before the scales were copied still point at the store
+            self.scales = np.load(config.get("scales") or Path(config["store"]) / SCALES)
+
+    def _as_stored(self, X):
+        if self.dtype in ("float32", "float16"):
+            if not sparse.issparse(X):
+                return X.astype(self.dtype)
+            # scipy sparse has no float16, only the rounding is kept
+            X = X.astype(np.float32)
+            X.data = X.data.astype(self.dtype).astype(np.float32)
+            return X
+        if self.scales is None:
+            return X
+
+        if sparse.issparse(X):
+            scales = self.scales[X.indices]
+            X = X.astype(np.float32)
+            X.data = quantize_int8(X.data, scales).astype(np.float32) * scales
+            return X
+        return quantize_int8(X, self.scales).astype(np.float32) * self.scales
+
+    def transform(self, texts: list[str]):
+        if self.vectorizer is not None:
+            X = self.vectorizer.transform(texts)
+        else:
+            X = self.encoder.encode(texts)
+
+        X = self._as_stored(X)
+        if self.svd is not None:
+            X = self.svd.transform(X).astype(np.float32)
+        return X
+
+    def close(self):
+        if self.encoder is not None:
+            self.encoder.close()
@@ -0,0 +1,293 @@
+import asyncio
+import csv
+import io
+import json
+import random
+import time
+from pathlib import Path
+
+
+DEFAULT_GEMINI_MODEL = "gemini-3-flash-preview"
+
+
+class GeminiClient:
+    """
+    Async Gemini text generation (google-genai's aio API).
+    """
+
+    def __init__(self, api_key: str, model: str = DEFAULT_GEMINI_MODEL):
+        from google import genai
+
+        self.client = genai.Client(api_key=api_key)
+        self.model = model
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.client.aio.models.generate_content(model=self.model, contents=prompt)
+        return response.text or ""
+
+
+class StubClient:
+    """
+    Offline stand-in for GeminiClient: answers each prompt with numbered
+    placeholder rows in the requested CSV format, after `latency`
+    seconds. failure_rate makes some calls raise or return junk, to
+    exercise retries and validation without the API.
+    """
+
+    def __init__(self, latency: float = 0.01, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        roll = self.random.random()
+        if roll < self.failure_rate / 2:
+            raise ConnectionError("stub: simulated API error")
+        if roll < self.failure_rate:
+            return "Sorry, I cannot help with that."
+
+        n, label = _prompt_request(prompt)
+        rows = [f'"نص تجريبي {self.calls}-{i} عن {label}",{label}' for i in range(n)]
+        return "```csv\ntext,label\n" + "\n".join(rows) + "\n```"
+
+
+def build_prompt(topic: str, label: str, n: int, batch: int) -> str:
+    return f"""
+Generate {n} Arabic text classification samples.
+
+The texts should be about: {topic}
+Every sample has the label: {label}
+This is batch {batch}; vary the wording, length and style.
+
+Output MUST be valid CSV only.
+Do NOT add explanations.
+Do NOT add markdown.
+Do NOT add extra text.
+
+CSV format exactly:
+text,label
+"""
+
+
+def _prompt_request(prompt: str) -> tuple[int, str]:
+    """
+    (rows, label) asked for by build_prompt, used by StubClient.
+    """
+    n = int(prompt.split("Generate ", 1)[1].split(" ", 1)[0])
+    label = prompt.split("Every sample has the label: ", 1)[1].split("\n", 1)[0]
+    return n, label
+
+
+def parse_csv_rows(text: str, label: str) -> list[tuple[str, str]]:
+    """
+    Valid (text, label) rows of one response: markdown fences and the
+    header are dropped, as are rows that are not exactly two fields,
+    have an empty text or carry another label.
+    """
+    lines = [line for line in text.strip().splitlines() if not line.strip().startswith("```")]
+    rows = []
+    for fields in csv.reader(lines):
+        if len(fields) != 2:
+            continue
+        sample, row_label = fields[0].strip(), fields[1].strip()
+        if not sample or row_label != label or (sample, row_label) == ("text", "label"):
+            continue
+        rows.append((sample, row_label))
+    return rows
+
+
+class RateLimiter:
+    """
+    At most `per_minute` calls per minute, spaced evenly.
+    """
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Checkpoint:
+    """
+    Rows written per class and the output size after the last complete
+    append. On resume the output is truncated to that size, dropping a
+    half-written chunk, and only the missing rows are requested; an
+    output that is missing or shorter than the checkpoint is refused.
+    The checkpoint is removed once every class has its rows. An existing
+    output without a checkpoint is only replaced with overwrite=True.
+    """
+
+    def __init__(self, path, config: dict):
+        self.path = Path(path)
+        self.config = config
+        self.rows = {}
+        self.bytes = 0
+
+    @classmethod
+    def resume(cls, path, config: dict, output: Path, overwrite: bool = False) -> "Checkpoint":
+        checkpoint = cls(path, config)
+        if not checkpoint.path.is_file():
+            # nothing to resume: start a new file, but never over one we did not start
+            if output.exists() and not overwrite:
+                raise ValueError(f"{output} already exists and has no checkpoint to resume; use --restart to overwrite it")
+            output.unlink(missing_ok=True)
+            return checkpoint
+
+        with open(checkpoint.path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["config"] != config:
+            raise ValueError(
+                f"{checkpoint.path} belongs to a run with other settings; "
+                "use the same topic, classes and count, or --restart"
+            )
+        checkpoint.rows = saved["rows"]
+        checkpoint.bytes = saved["bytes"]
+        size = output.stat().st_size if output.exists() else 0
+        if size < checkpoint.bytes:
+            # rows the checkpoint counts are gone, resuming would leave them missing
+            raise ValueError(
+                f"{output} is missing or shorter than its checkpoint {checkpoint.path}; use --restart"
+            )
+        if size > checkpoint.bytes:
+            with open(output, "r+b") as f:
+                f.truncate(checkpoint.bytes)
+        return checkpoint
+
+    def save(self):
+        # written to a temporary file and renamed, so it is never half written
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"config": self.config, "rows": self.rows, "bytes": self.bytes}, f, indent=2)
+        tmp.replace(self.path)
+
+
+def class_targets(count: int, classes: list[str]) -> dict[str, int]:
+    """
+    count split evenly over classes, the remainder to the first ones.
+    """
+    base, extra = divmod(count, len(classes))
+    return {label: base + (i < extra) for i, label in enumerate(classes)}
+
+
+class SyntheticDataGenerator:
+    """
+    Generate `count` labelled rows as many small per-class requests.
+
+    Requests run concurrently (at most `concurrency` at once, at most
+    `rate_per_minute` started per minute). A failed or unusable response
+    is retried with exponential backoff; valid rows are appended to the
+    CSV as soon as they arrive and the checkpoint is updated, so an
+    interrupted run continues where it stopped. Classes still short after
+    a round (responses with fewer valid rows than asked) get another
+    round, up to max_rounds.
+    """
+
+    def __init__(self, client, topic: str, classes: list[str], count: int, output,
+                 batch_size: int = 25, concurrency: int = 4, rate_per_minute: float = 60,
+                 max_retries: int = 5, backoff: float = 1.0, max_rounds: int = 3, restart: bool = False):
+        self.client = client
+        self.topic = topic
+        self.classes = list(classes)
+        self.count = count
+        self.output = Path(output)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rate_per_minute = rate_per_minute
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_rounds = max_rounds
+
+        self.targets = class_targets(count, self.classes)
+        config = {"topic": topic, "classes": self.classes, "count": count}
+        checkpoint_path = self.output.with_suffix(self.output.suffix + ".checkpoint.json")
+        if restart:
+            checkpoint_path.unlink(missing_ok=True)
+        self.checkpoint = Checkpoint.resume(checkpoint_path, config, self.output, overwrite=restart)
+
+        self.requests = 0
+        self.retries = 0
+        self.failed = 0
+        self.invalid_rows = 0
+
+    def missing(self) -> dict[str, int]:
+        return {label: target - self.checkpoint.rows.get(label, 0) for label, target in self.targets.items()}
+
+    def _append(self, label: str, rows: list[tuple[str, str]]) -> int:
+        rows = rows[:max(0, self.missing()[label])]
+        if not rows:
+            return 0
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if self.checkpoint.bytes == 0:
+            writer.writerow(["text", "label"])
+        writer.writerows(rows)
+
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output, "ab") as f:
+            f.write(buffer.getvalue().encode("utf-8"))
+        self.checkpoint.bytes = self.output.stat().st_size
+        self.checkpoint.rows[label] = self.checkpoint.rows.get(label, 0) + len(rows)
+        self.checkpoint.save()
+        return len(rows)
+
+    async def _request(self, label: str, n: int, batch: int, semaphore, limiter):
+        prompt = build_prompt(self.topic, label, n, batch)
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await limiter.acquire()
+                self.requests += 1
+                try:
+                    rows = parse_csv_rows(await self.client.generate(prompt), label)
+                except Exception:
+                    rows = None
+                if rows:
+                    self.invalid_rows += max(0, n - len(rows))
+                    # no await between check and write, so appends never interleave
+                    self._append(label, rows)
+                    return
+                if attempt < self.max_retries:
+                    self.retries += 1
+                    delay = self.backoff * 2 ** attempt
+                    await asyncio.sleep(delay * (0.5 + random.random() / 2))
+            self.failed += 1
+
+    async def run(self) -> dict:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate_per_minute)
+
+        for round_ in range(self.max_rounds):
+            missing = {label: n for label, n in self.missing().items() if n > 0}
+            if not missing:
+                break
+            tasks = []
+            for label, n in missing.items():
+                for batch, start in enumerate(range(0, n, self.batch_size)):
+                    size = min(self.batch_size, n - start)
+                    tasks.append(self._request(label, size, round_ * 1000 + batch, semaphore, limiter))
+            await asyncio.gather(*tasks)
+
+        if not any(n > 0 for n in self.missing().values()):
+            self.checkpoint.path.unlink(missing_ok=True)
+
+        return {
+            "rows": dict(self.checkpoint.rows),
+            "missing": {label: n for label, n in self.missing().items() if n > 0},
+            "requests": self.requests,
+            "retries": self.retries,
+            "failed_requests": self.failed,
+            "invalid_rows": self.invalid_rows,
+        }
@@ -0,0 +1,319 @@
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+from scipy import sparse
+
+
+ENDPOINTS = ("clean", "embed", "predict")
+
+
+class LatencyStats:
+    """
+    Request counters and a window of recent latencies per endpoint,
+    for p50/p99 and throughput.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.started = time.perf_counter()
+        self.latencies = {name: deque(maxlen=window) for name in ENDPOINTS}
+        self.requests = dict.fromkeys(ENDPOINTS, 0)
+        self.texts = dict.fromkeys(ENDPOINTS, 0)
+        self.batches = 0
+        self.batched_requests = 0
+        self.errors = 0
+
+    def record(self, endpoint: str, n_texts: int, seconds: float):
+        self.latencies[endpoint].append(seconds)
+        self.requests[endpoint] += 1
+        self.texts[endpoint] += n_texts
+
+    def snapshot(self) -> dict:
+        uptime = time.perf_counter() - self.started
+        endpoints = {}
+        for name in ENDPOINTS:
+            window = np.array(self.latencies[name])
+            endpoints[name] = {
+                "requests": self.requests[name],
+                "texts": self.texts[name],
+                "p50_ms": float(np.percentile(window, 50) * 1000) if len(window) else None,
+                "p99_ms": float(np.percentile(window, 99) * 1000) if len(window) else None,
+            }
+
+        total_requests = sum(self.requests.values())
+        return {
+            "uptime_seconds": uptime,
+            "requests": total_requests,
+            "errors": self.errors,
+            "requests_per_sec": total_requests / max(uptime, 1e-12),
+            "texts_per_sec": sum(self.texts.values()) / max(uptime, 1e-12),
+            "batches": self.batches,
+            "mean_requests_per_batch": self.batched_requests / max(self.batches, 1),
+            "endpoints": endpoints,
+        }
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into one call of `process`.
+
+    The first waiting request opens a batch; requests arriving within
+    max_wait_ms join it, until max_batch_size texts are queued. The
+    batch runs in a worker thread so the event loop keeps accepting
+    requests meanwhile. When a batch fails, its requests are rerun one
+    by one, so only the request that fails gets the error.
+    """
+
+    def __init__(self, process, max_batch_size: int = 256, max_wait_ms: float = 5.0, stats: LatencyStats | None = None):
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, endpoint: str, texts: list[str], proba: bool = False):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((endpoint, texts, proba, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        size = len(batch[0][1])
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[1])
+        return batch
+
+    async def _run_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        requests = [(endpoint, texts, proba) for endpoint, texts, proba, _ in batch]
+        try:
+            results = await loop.run_in_executor(self.executor, self.process, requests)
+        except Exception as e:
+            if len(batch) > 1:
+                for item in batch:
+                    await self._run_batch([item])
+                return
+            results = [e]
+        else:
+            if self.stats is not None:
+                self.stats.batches += 1
+                self.stats.batched_requests += len(batch)
+
+        for (*_, future), result in zip(batch, results):
+            # the client may have gone away and cancelled its future
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _run(self):
+        while True:
+            await self._run_batch(await self._collect())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.executor.shutdown()
+
+
+def _rows_as_json(X) -> list:
+    if sparse.issparse(X):
+        X = X.tocsr()
+        return [
+            {"indices": X.indices[start:stop].tolist(), "values": X.data[start:stop].tolist()}
+            for start, stop in zip(X.indptr[:-1], X.indptr[1:])
+        ]
+    return np.asarray(X, dtype=np.float32).tolist()
+
+
+def empty_result(endpoint: str, proba: bool = False) -> dict:
+    """
+    The response to a request without texts, which skips the batcher.
+    """
+    if endpoint == "clean":
+        return {"texts": []}
+    if endpoint == "embed":
+        return {"embeddings": []}
+    return {"predictions": [], "probabilities": []} if proba else {"predictions": []}
+
+
+class InferenceService:
+    """
+    The cleaning pipeline, featurizer and model kept in memory, and the
+    batch function behind /clean, /embed and /predict.
+
+    A batch mixes requests of all three endpoints: every text is cleaned,
+    texts of /embed and /predict requests are featurized in one call, and
+    /predict rows go through the model in one call.
+    """
+
+    def __init__(self, model, featurizer, cleaner=None, needs_dense: bool = False):
+        self.model = model
+        self.featurizer = featurizer
+        self.cleaner = cleaner
+        self.needs_dense = needs_dense
+
+    def clean(self, texts: list[str]) -> list[str]:
+        if self.cleaner is None:
+            return list(texts)
+        return [self.cleaner(text) for text in texts]
+
+    def process(self, requests: list[tuple[str, list[str], bool]]) -> list[dict]:
+        cleaned = [self.clean(texts) for _, texts, _ in requests]
+        featurized = [i for i, (endpoint, _, _) in enumerate(requests) if endpoint != "clean"]
+        results = [{"texts": texts} for texts in cleaned]
+        if not featurized:
+            return results
+
+        X = self.featurizer.transform([text for i in featurized for text in cleaned[i]])
+        if sparse.issparse(X):
+            X = X.tocsr()
+        bounds = np.cumsum([0] + [len(cleaned[i]) for i in featurized])
+        rows = {i: slice(bounds[k], bounds[k + 1]) for k, i in enumerate(featurized)}
+
+        predicted = [i for i in featurized if requests[i][0] == "predict"]
+        if predicted:
+            index = np.concatenate([np.arange(rows[i].start, rows[i].stop) for i in predicted])
+            X_pred = X[index]
+            if self.needs_dense and sparse.issparse(X_pred):
+                X_pred = X_pred.toarray()
+
+            want_proba = any(requests[i][2] for i in predicted) and hasattr(self.model, "predict_proba")
+            if want_proba:
+                probabilities = self.model.predict_proba(X_pred)
+                labels = self.model.classes_[probabilities.argmax(axis=1)]
+            else:
+                labels = self.model.predict(X_pred)
+
+            offset = 0
+            for i in predicted:
+                n = rows[i].stop - rows[i].start
+                results[i] = {"predictions": labels[offset:offset + n].tolist()}
+                if requests[i][2] and want_proba:
+                    results[i]["probabilities"] = [
+                        dict(zip(self.model.classes_.tolist(), p.tolist()))
+                        for p in probabilities[offset:offset + n]
+                    ]
+                offset += n
+
+        for i in featurized:
+            if requests[i][0] == "embed":
+                results[i] = {"embeddings": _rows_as_json(X[rows[i]])}
+        return results
+
+
+class InferenceServer:
+    """
+    Minimal HTTP/1.1 server on asyncio streams, over TCP or a Unix socket.
+
+    POST /clean, /embed, /predict with {"texts": [...]} ("proba": true
+    adds class probabilities to /predict); GET /stats for the counters
+    and GET /health.
+    """
+
+    def __init__(self, service: InferenceService, max_batch_size: int = 256, max_wait_ms: float = 5.0):
+        self.service = service
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(service.process, max_batch_size, max_wait_ms, self.stats)
+
+    async def handle_request(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        endpoint = path.strip("/")
+        if method == "GET" and endpoint == "stats":
+            return HTTPStatus.OK, self.stats.snapshot()
+        if method == "GET" and endpoint == "health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if endpoint not in ENDPOINTS:
+            return HTTPStatus.NOT_FOUND, {"error": f"unknown endpoint: {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+            texts = payload["texts"]
+            if isinstance(texts, str):
+                texts = [texts]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return HTTPStatus.BAD_REQUEST, {"error": 'body must be JSON like {"texts": ["..."]}'}
+
+        proba = bool(payload.get("proba"))
+        if not texts:
+            return HTTPStatus.OK, empty_result(endpoint, proba)
+
+        start = time.perf_counter()
+        result = await self.batcher.submit(endpoint, texts, proba)
+        self.stats.record(endpoint, len(texts), time.perf_counter() - start)
+        return HTTPStatus.OK, result
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, result = await self.handle_request(method, path.split("?")[0], body)
+                except Exception as e:
+                    self.stats.errors += 1
+                    status, result = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                payload = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000, unix_socket: str | None = None, ready=None):
+        self.batcher.start()
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.close()
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import time
+from graphlib import CycleError, TopologicalSorter
+from pathlib import Path
+
+import yaml
+
+
+STATE_DIR = Path("outputs/pipeline")
+
+# stage keys that are not parameters of the stage itself
+_STRUCTURE_KEYS = ("type", "needs")
+
+# paths a stage type writes, by parameter name
+OUTPUT_KEYS = ("output", "save_model")
+
+# paths a stage type reads, by parameter name; a model id that is not a
+# local path is left to the stage
+INPUT_KEYS = ("input", "groups", "model")
+
+
+class Stage:
+    """
+    One node of the pipeline DAG: a stage type, its parameters and the
+    stages whose results it consumes.
+    """
+
+    def __init__(self, name: str, kind: str, params: dict, needs: list[str]):
+        self.name = name
+        self.kind = kind
+        self.params = params
+        self.needs = needs
+
+    @property
+    def outputs(self) -> list[Path]:
+        return [Path(self.params[key]) for key in OUTPUT_KEYS if self.params.get(key)]
+
+    @property
+    def inputs(self) -> dict[str, Path]:
+        return {
+            key: Path(self.params[key])
+            for key in INPUT_KEYS
+            if isinstance(self.params.get(key), str) and Path(self.params[key]).exists()
+        }
+
+
+def load_pipeline(path) -> tuple[dict[str, Stage], list[str]]:
+    """
+    Parse a pipeline YAML file:
+
+        stages:
+          clean:
+            type: clean
+            input: outputs/data/synthetic.csv
+            ...
+          embed:
+            type: model2vec
+            needs: clean
+            ...
+
+    Returns the stages by name and a dependency-respecting run order.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    stages = {}
+    for name, spec in (config.get("stages") or {}).items():
+        if not isinstance(spec, dict) or "type" not in spec:
+            raise ValueError(f"Stage '{name}' needs a type")
+        needs = spec.get("needs") or []
+        needs = [needs] if isinstance(needs, str) else list(needs)
+        params = {k: v for k, v in spec.items() if k not in _STRUCTURE_KEYS}
+        stages[name] = Stage(name, spec["type"], params, needs)
+
+    if not stages:
+        raise ValueError(f"No stages in {path}")
+
+    for stage in stages.values():
+        for need in stage.needs:
+            if need not in stages:
+                raise ValueError(f"Stage '{stage.name}' needs unknown stage '{need}'")
+
+    try:
+        order = list(TopologicalSorter({name: stage.needs for name, stage in stages.items()}).static_order())
+    except CycleError as e:
+        raise ValueError(f"Pipeline has a cycle: {' -> '.join(e.args[1])}")
+    return stages, order
+
+
+class PipelineState:
+    """
+    Fingerprints of the last successful run of each stage, and a cache of
+    input file hashes keyed by size and mtime so unchanged inputs are not
+    re-read.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.stages = {}
+        self.files = {}
+        if self.path.is_file():
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.stages = state.get("stages", {})
+            self.files = state.get("files", {})
+
+    def file_digest(self, path) -> str:
+        """
+        sha256 of a file, or of every file under a directory.
+        """
+        path = Path(path)
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+
+        digest = hashlib.sha256()
+        for file in files:
+            stat = file.stat()
+            key = str(file.resolve())
+            cached = self.files.get(key)
+            if cached is None or cached["size"] != stat.st_size or cached["mtime_ns"] != stat.st_mtime_ns:
+                file_hash = hashlib.sha256()
+                with open(file, "rb") as f:
+                    while block := f.read(1 << 20):
+                        file_hash.update(block)
+                cached = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_hash.hexdigest()}
+                self.files[key] = cached
+            digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode("utf-8"))
+            digest.update(cached["sha256"].encode("ascii"))
+        return digest.hexdigest()
+
+    def is_current(self, stage: Stage, fingerprint: str) -> bool:
+        return (
+            self.stages.get(stage.name, {}).get("fingerprint") == fingerprint
+            and all(output.exists() for output in stage.outputs)
+        )
+
+    def record(self, stage: Stage, fingerprint: str, seconds: float):
+        self.stages[stage.name] = {"fingerprint": fingerprint, "seconds": seconds, "finished": time.time()}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages, "files": self.files}, f, indent=2)
+
+
+def stage_fingerprint(stage: Stage, upstream: list[str], input_digests: dict[str, str]) -> str:
+    """
+    Hash of everything a stage's result depends on: its type and
+    parameters, the fingerprints of the stages it needs, and the content
+    of the external files it reads.
+    """
+    payload = json.dumps(
+        {"type": stage.kind, "params": stage.params, "upstream": upstream, "inputs": input_digests},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def run_pipeline(stages: dict[str, Stage], order: list[str], runners: dict, state: PipelineState,
+                 force: bool = False, dry_run: bool = False, echo=print) -> list[tuple[str, str, float]]:
+    """
+    Run stages in order, skipping those whose fingerprint matches the
+    last run and whose outputs exist.
+
+    runners maps a stage type to an object with run(params, inputs) and
+    load(params). A stage's result is passed in memory to the stages
+    that need it; if it was skipped, it is loaded from its outputs only
+    when a downstream stage actually runs.
+    Returns (stage, "ran" | "skipped" | "would run", seconds) per stage.
+    """
+    for stage in stages.values():
+        if stage.kind not in runners:
+            raise ValueError(f"Unknown stage type '{stage.kind}' (stage '{stage.name}'); use one of {', '.join(runners)}")
+
+    fingerprints = {}
+    results = {}
+    summary = []
+
+    def result_of(name: str):
+        if name not in results:
+            results[name] = runners[stages[name].kind].load(stages[name].params)
+        return results[name]
+
+    for name in order:
+        stage = stages[name]
+        input_digests = {key: state.file_digest(path) for key, path in stage.inputs.items()}
+        fingerprints[name] = stage_fingerprint(stage, [fingerprints[n] for n in stage.needs], input_digests)
+
+        if not force and state.is_current(stage, fingerprints[name]):
+            echo(f"[{name}] up to date, skipped")
+            summary.append((name, "skipped", 0.0))
+            continue
+        if dry_run:
+            echo(f"[{name}] would run")
+            summary.append((name, "would run", 0.0))
+            continue
+
+        echo(f"[{name}] running ({stage.kind})")
+        start = time.perf_counter()
+        results[name] = runners[stage.kind].run(stage.params, [result_of(n) for n in stage.needs])
+        elapsed = time.perf_counter() - start
+
+        state.record(stage, fingerprints[name], elapsed)
+        state.save()
+        echo(f"[{name}] done in {elapsed:.2f} s")
+        summary.append((name, "ran", elapsed))
+
+    if not dry_run:
+        state.save()
+    return summary
@@ -0,0 +1,190 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from utils.batching import fixed_batches, padding_efficiency, token_budget_batches
+from utils.data_handler import row_shards
+from utils.static_encoder import StaticEncoder, load_tokenizer
+
+
+ENGINES = ("native", "sentence-transformers")
+
+
+class SentenceEncoder:
+    """
+    Normalized Model2Vec sentence vectors from either engine:
+    "native" (StaticEncoder, NumPy only) or "sentence-transformers".
+
+    Only encoders that pad a batch to its longest text (`pads`: a
+    transformer model under sentence-transformers) are batched by length:
+    batches of at most batch_size rows and max_tokens tokens (0: no token
+    budget). A schedule that would pad more than batch_size batches in
+    file order is replaced by them. `padding` accumulates real tokens,
+    padded tokens in file order and padded tokens as scheduled.
+
+    Static models (the native engine, or a StaticEmbedding module under
+    sentence-transformers) pool without padding, so they get batch_size
+    batches in file order and `padding` stays zero.
+    """
+
+    def __init__(self, model_name: str, engine: str = "native", batch_size: int = 32, max_tokens: int = 16384):
+        if engine == "native":
+            self.model = StaticEncoder(model_name, normalize=True)
+            self.tokenizer = self.model.tokenizer
+            self.pads = False
+        elif engine == "sentence-transformers":
+            from sentence_transformers import SentenceTransformer
+            from sentence_transformers.models import StaticEmbedding
+            self.model = SentenceTransformer(model_name)
+            self.tokenizer = load_tokenizer(model_name)
+            self.pads = not isinstance(self.model[0], StaticEmbedding)
+        else:
+            raise ValueError("engine must be either 'native' or 'sentence-transformers'")
+
+        self.engine = engine
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.padding = np.zeros(3, dtype=np.int64)
+
+    @property
+    def dim(self) -> int:
+        if self.engine == "native":
+            return self.model.dim
+        return self.model.get_sentence_embedding_dimension()
+
+    def schedule(self, lengths: np.ndarray) -> list[np.ndarray]:
+        fixed = fixed_batches(len(lengths), self.batch_size)
+        if not self.pads:
+            return fixed
+
+        batches = token_budget_batches(lengths, self.max_tokens or np.inf, self.batch_size)
+        real, fixed_padded = padding_efficiency(lengths, fixed)
+        scheduled_padded = padding_efficiency(lengths, batches)[1]
+        if scheduled_padded > fixed_padded:
+            batches, scheduled_padded = fixed, fixed_padded
+
+        self.padding += (real, fixed_padded, scheduled_padded)
+        return batches
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if self.engine == "native":
+            ids, lengths = self.model.tokenize(texts)
+            return self.model.encode_tokens(ids, lengths, self.schedule(lengths))
+
+        if not self.pads:
+            return self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        lengths = np.array([len(e.ids) for e in encodings], dtype=np.int64)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for batch in self.schedule(lengths):
+            vectors[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+        return vectors
+
+    def close(self):
+        pass
+
+
+_WORKER_ENCODER = None
+
+
+def _init_encode_worker(encoder_args: dict):
+    """
+    Process pool initializer: load the model once per worker.
+    """
+    global _WORKER_ENCODER
+    # one tokenizer thread per process, the pool already uses every core
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    _WORKER_ENCODER = SentenceEncoder(**encoder_args)
+
+
+def _worker_dim() -> int:
+    return _WORKER_ENCODER.dim
+
+
+def _encode_shard(texts: list[str], shm_name: str, shape: tuple, start: int) -> np.ndarray:
+    """
+    Encode a shard into rows [start, start + len(texts)) of the shared
+    output matrix; only the padding counters travel back to the parent.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        before = _WORKER_ENCODER.padding.copy()
+        out[start:start + len(texts)] = _WORKER_ENCODER.encode(texts)
+        del out
+    finally:
+        shm.close()
+    return _WORKER_ENCODER.padding - before
+
+
+class ParallelSentenceEncoder:
+    """
+    SentenceEncoder sharded over a process pool.
+
+    Every worker loads the model once and writes its vectors straight
+    into a shared-memory matrix at its row offset, so vectors are never
+    pickled back to the parent. Each row is encoded exactly as in a
+    single process, so the output is the same.
+    """
+
+    def __init__(self, workers: int, **encoder_args):
+        self.workers = workers
+        if os.name == "posix":
+            # workers attaching to a segment register it with the resource
+            # tracker; they must share the parent's tracker, which forgets
+            # the segment when the parent unlinks it
+            resource_tracker.ensure_running()
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_encode_worker,
+            initargs=(encoder_args,),
+        )
+        self.dim = self.pool.submit(_worker_dim).result()
+        self.padding = np.zeros(3, dtype=np.int64)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        shape = (len(texts), self.dim)
+        if len(texts) == 0:
+            return np.zeros(shape, dtype=np.float32)
+
+        shm = shared_memory.SharedMemory(create=True, size=len(texts) * self.dim * 4)
+        try:
+            futures = [
+                self.pool.submit(_encode_shard, texts[start:stop], shm.name, shape, start)
+                for start, stop in row_shards(len(texts), self.workers)
+            ]
+            for future in futures:
+                self.padding += future.result()
+            vectors = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+        return vectors
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def load_sentence_encoder(model_name: str, engine: str = "native", batch_size: int = 32, max_tokens: int = 16384, workers: int = 1):
+    args = {"model_name": model_name, "engine": engine, "batch_size": batch_size, "max_tokens": max_tokens}
+    if engine not in ENGINES:
+        raise ValueError("engine must be either 'native' or 'sentence-transformers'")
+    if workers > 1:
+        return ParallelSentenceEncoder(workers, **args)
+    return SentenceEncoder(**args)
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import struct
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from utils.batching import fixed_batches, token_budget_batches
+
+
+# safetensors dtype tags -> numpy dtypes (BF16 is widened on lookup)
+_SAFETENSORS_DTYPES = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "BF16": np.uint16,
+}
+
+# tensor names used by model2vec and by sentence-transformers StaticEmbedding
+_EMBEDDING_KEYS = ("embeddings", "embedding.weight")
+
+
+def mmap_safetensors(path, key: str | None = None) -> tuple[np.ndarray, str]:
+    """
+    Memory-map one 2-D tensor of a .safetensors file without reading it.
+
+    Returns (array, safetensors dtype tag).
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    header.pop("__metadata__", None)
+
+    if key is None:
+        key = next((k for k in _EMBEDDING_KEYS if k in header), None)
+    if key is None:
+        matrices = [k for k, v in header.items() if len(v["shape"]) == 2]
+        if len(matrices) != 1:
+            raise ValueError(f"Cannot find the embedding matrix in {path}: {list(header)}")
+        key = matrices[0]
+
+    info = header[key]
+    if info["dtype"] not in _SAFETENSORS_DTYPES:
+        raise ValueError(f"Unsupported safetensors dtype: {info['dtype']}")
+
+    start, _ = info["data_offsets"]
+    array = np.memmap(
+        path,
+        dtype=_SAFETENSORS_DTYPES[info["dtype"]],
+        mode="r",
+        offset=8 + header_len + start,
+        shape=tuple(info["shape"]),
+    )
+    return array, info["dtype"]
+
+
+def _model_root(model: str) -> Path:
+    """
+    A local path as is, or the hub cache snapshot of a repo id
+    (downloaded once).
+    """
+    path = Path(model)
+    if not path.exists():
+        from huggingface_hub import snapshot_download
+        path = Path(snapshot_download(model))
+    return path
+
+
+def resolve_model_dir(model: str) -> Path:
+    """
+    Local directory holding the static embedding files of `model`.
+
+    Accepts a local path or a Hugging Face repo id (downloaded once into
+    the hub cache). sentence-transformers layouts are followed through
+    modules.json to their StaticEmbedding module folder.
+    """
+    path = _model_root(model)
+
+    modules_file = path / "modules.json"
+    if modules_file.exists():
+        with open(modules_file, encoding="utf-8") as f:
+            modules = json.load(f)
+        for module in modules:
+            if module.get("type", "").endswith("StaticEmbedding"):
+                return path / module["path"]
+
+    return path
+
+
+@lru_cache(maxsize=None)
+def model_revision(model: str) -> str:
+    """
+    Version of a model's files, so a local directory reused for another
+    model gets another revision. A hub model is named by its commit hash;
+    a local directory by a hash of every file in it, whatever the
+    layout (static or transformer), computed once per process.
+    """
+    root = _model_root(model)
+    if root.parent.name == "snapshots":
+        return root.name[:16]
+
+    digest = hashlib.sha256()
+    files = [root] if root.is_file() else sorted(p for p in root.rglob("*") if p.is_file())
+    for path in files:
+        digest.update(str(path.relative_to(root)).encode("utf-8"))
+        with open(path, "rb") as f:
+            while block := f.read(1 << 20):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def load_tokenizer(model: str):
+    """
+    Fast tokenizer of a static model, e.g. to count tokens per text.
+    Padding saved in tokenizer.json is turned off, as sentence-transformers'
+    StaticEmbedding does: pad tokens must not enter the mean.
+    """
+    from tokenizers import Tokenizer
+    tokenizer = Tokenizer.from_file(str(resolve_model_dir(model) / "tokenizer.json"))
+    tokenizer.no_padding()
+    return tokenizer
+
+
+class StaticEncoder:
+    """
+    NumPy encoder for static (Model2Vec) embedding models.
+
+    A static model is a token -> vector table followed by mean pooling, so
+    it needs no torch: texts are tokenized in batches with the `tokenizers`
+    fast tokenizer, rows are gathered from the memory-mapped table and
+    pooled per text with np.add.reduceat.
+    """
+
+    def __init__(self, model: str, normalize: bool = True):
+        self.model = model
+        self.normalize = normalize
+        self.table, self._dtype_tag = mmap_safetensors(resolve_model_dir(model) / "model.safetensors")
+        self.tokenizer = load_tokenizer(model)
+
+    @property
+    def dim(self) -> int:
+        return self.table.shape[1]
+
+    def _lookup(self, ids: np.ndarray) -> np.ndarray:
+        rows = self.table[ids]
+        if self._dtype_tag == "BF16":
+            return (rows.astype(np.uint32) << 16).view(np.float32)
+        return rows.astype(np.float32, copy=False)
+
+    def tokenize(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Token ids of all texts, flattened, plus the token count per text.
+        """
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        lengths = np.fromiter((len(e.ids) for e in encodings), dtype=np.int64, count=len(encodings))
+        ids = np.fromiter(
+            (i for e in encodings for i in e.ids), dtype=np.int64, count=int(lengths.sum())
+        )
+        return ids, lengths
+
+    def pool(self, ids: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """
+        Mean of the token vectors of each text; texts without tokens get zeros.
+        """
+        out = np.zeros((len(lengths), self.dim), dtype=np.float32)
+        non_empty = lengths > 0
+        if not non_empty.any():
+            return out
+
+        starts = (np.cumsum(lengths) - lengths)[non_empty]
+        # empty texts add no rows, so each segment ends where the next non-empty one starts
+        sums = np.add.reduceat(self._lookup(ids), starts, axis=0)
+        out[non_empty] = sums / lengths[non_empty, None]
+
+        if self.normalize:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.maximum(norms, 1e-12)
+        return out
+
+    def encode_tokens(self, ids: np.ndarray, lengths: np.ndarray, batches: list[np.ndarray]) -> np.ndarray:
+        """
+        Pool tokenized texts batch by batch; `batches` hold row indices
+        (any order) and vectors come back in row order.
+        """
+        out = np.zeros((len(lengths), self.dim), dtype=np.float32)
+        starts = np.cumsum(lengths) - lengths
+
+        for batch in batches:
+            batch_lengths = lengths[batch]
+            # positions of the batch's tokens inside the flat id array
+            offsets = np.cumsum(batch_lengths) - batch_lengths
+            positions = (
+                np.arange(batch_lengths.sum())
+                - np.repeat(offsets, batch_lengths)
+                + np.repeat(starts[batch], batch_lengths)
+            )
+            out[batch] = self.pool(ids[positions], batch_lengths)
+
+        return out
+
+    def encode(self, texts: list[str], batch_size: int = 1024, max_tokens: int | None = None) -> np.ndarray:
+        """
+        Vectors for `texts`, pooled in batches of batch_size rows, or of at
+        most max_tokens tokens (rows grouped by length) when it is given.
+        """
+        if len(texts) == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        ids, lengths = self.tokenize(texts)
+        if max_tokens:
+            batches = token_budget_batches(lengths, max_tokens)
+        else:
+            batches = fixed_batches(len(texts), batch_size)
+        return self.encode_tokens(ids, lengths, batches)
@@ -0,0 +1,218 @@
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+DEFAULT_N_FEATURES = 2 ** 20
+
+
+class HashingTfidf:
+    """
+    TF-IDF over hashed features, fitted one chunk at a time.
+
+    No vocabulary is kept: terms are hashed into n_features columns, so
+    memory does not grow with the corpus. partial_fit only counts document
+    frequencies; after all chunks are seen, transform applies the smoothed
+    IDF and L2 norm exactly as TfidfVectorizer does (same analyzer
+    defaults), up to hash collisions.
+    """
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES, ngram_range: tuple = (1, 1)):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=self.ngram_range,
+            alternate_sign=False,
+            norm=None,
+        )
+        self.n_docs = 0
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self._idf = None
+
+    def partial_fit(self, texts):
+        counts = self.vectorizer.transform(texts)
+        # hashed CSR rows hold each column once, so this counts documents
+        self.df += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+        self._idf = None
+        return self
+
+    @property
+    def idf(self) -> np.ndarray:
+        """
+        Smoothed IDF, as TfidfTransformer(smooth_idf=True).
+        """
+        if self._idf is None:
+            self._idf = np.log((1 + self.n_docs) / (1 + self.df)) + 1
+        return self._idf
+
+    def transform(self, texts):
+        X = self.vectorizer.transform(texts)
+        X.data *= self.idf[X.indices]
+        return normalize(X, norm="l2", copy=False)
+
+    def save(self, path):
+        """
+        Keep what transform needs: the IDF vector and the hashing config.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "idf.npy", self.idf)
+        with open(path / "tfidf.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "kind": "hashing",
+                "n_features": self.n_features,
+                "ngram_range": list(self.ngram_range),
+                "n_docs": self.n_docs,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path) -> "HashingTfidf":
+        path = Path(path)
+        with open(path / "tfidf.json", encoding="utf-8") as f:
+            config = json.load(f)
+
+        tfidf = cls(config["n_features"], config["ngram_range"])
+        tfidf.n_docs = config["n_docs"]
+        tfidf._idf = np.load(path / "idf.npy")
+        return tfidf
+
+
+def encode_terms(terms) -> np.ndarray:
+    return np.array([term.encode("utf-8") for term in terms], dtype=bytes)
+
+
+class VocabularyTfidf:
+    """
+    A fitted TfidfVectorizer reduced to arrays: the terms, sorted (which
+    is also their column order in sklearn), and the IDF per column.
+
+    Terms are kept as fixed-width UTF-8 bytes, which sort in the same
+    order as the strings. terms.npy is opened with mmap, so loading costs
+    no parsing and no dict; transform looks tokens up with
+    np.searchsorted and gives the same matrix as the fitted vectorizer.
+    """
+
+    def __init__(self, terms: np.ndarray, idf: np.ndarray, ngram_range: tuple = (1, 1)):
+        self.terms = terms
+        self.idf = idf
+        self.ngram_range = tuple(ngram_range)
+        self.analyzer = CountVectorizer(ngram_range=self.ngram_range).build_analyzer()
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer) -> "VocabularyTfidf":
+        return cls(encode_terms(vectorizer.get_feature_names_out()), vectorizer.idf_, vectorizer.ngram_range)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.terms)
+
+    def transform(self, texts):
+        tokens = [self.analyzer(text) for text in texts]
+        lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+        flat = encode_terms([token for doc in tokens for token in doc])
+
+        rows = np.repeat(np.arange(len(tokens)), lengths)
+        if len(flat) and self.n_features:
+            cols = np.minimum(np.searchsorted(self.terms, flat), self.n_features - 1)
+            known = self.terms[cols] == flat
+        else:
+            cols = known = np.zeros(len(flat), dtype=bool)
+
+        X = sparse.csr_matrix(
+            (np.ones(int(known.sum())), (rows[known], cols[known])),
+            shape=(len(tokens), self.n_features),
+        )
+        X.sum_duplicates()
+        X.data *= self.idf[X.indices]
+        return normalize(X, norm="l2", copy=False)
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "terms.npy", self.terms)
+        np.save(path / "idf.npy", self.idf)
+        with open(path / "tfidf.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "kind": "vocabulary",
+                "n_features": self.n_features,
+                "ngram_range": list(self.ngram_range),
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "VocabularyTfidf":
+        path = Path(path)
+        with open(path / "tfidf.json", encoding="utf-8") as f:
+            config = json.load(f)
+
+        mode = "r" if mmap else None
+        return cls(
+            np.load(path / "terms.npy", mmap_mode=mode),
+            np.load(path / "idf.npy", mmap_mode=mode),
+            config["ngram_range"],
+        )
+
+
+def load_tfidf(path):
+    """
+    Load a saved TF-IDF transform, vocabulary or hashing based.
+    """
+    with open(Path(path) / "tfidf.json", encoding="utf-8") as f:
+        kind = json.load(f)["kind"]
+
+    if kind == "vocabulary":
+        return VocabularyTfidf.load(path)
+    if kind == "hashing":
+        return HashingTfidf.load(path)
+    raise ValueError(f"Unknown TF-IDF kind: {kind}")
+
+
+_WORKER_TFIDF = None
+
+
+def _init_tfidf_worker(path: str):
+    """
+    Process pool initializer: open the saved transform once per worker.
+    """
+    global _WORKER_TFIDF
+    _WORKER_TFIDF = load_tfidf(path)
+
+
+def _transform_chunk(texts):
+    return _WORKER_TFIDF.transform(texts)
+
+
+def iter_transform(path, items, workers: int = 1):
+    """
+    TF-IDF matrices for a stream of (texts, extra) items, yielded in
+    order as (X, extra). With workers > 1 chunks are transformed in a
+    process pool, keeping at most two chunks per worker in flight.
+    """
+    if workers <= 1:
+        tfidf = load_tfidf(path)
+        for texts, extra in items:
+            yield tfidf.transform(texts), extra
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_tfidf_worker,
+        initargs=(str(path),),
+    ) as pool:
+        pending = deque()
+        for texts, extra in items:
+            pending.append((pool.submit(_transform_chunk, texts), extra))
+            if len(pending) > 2 * workers:
+                future, extra = pending.popleft()
+                yield future.result(), extra
+
+        while pending:
+            future, extra = pending.popleft()
+            yield future.result(), extra
@@ -61,24 +61,39 @@ def plot_class_distribution_bar(
 def print_numeric_summary(values, title: str):
     arr = np.array(values)
 
+    print_summary(
+        {
+            "count": len(arr),
+            "mean": arr.mean(),
+            "median": np.median(arr),
+            "std": arr.std(),
+        },
+        title,
+    )
+
+
+def print_summary(summary: dict, title: str):
+    """
+    Print a {count, mean, median, std} dict, e.g. LengthHistogram.summary().
+    """
     print(f"\n📊 {title} Summary")
     print("-" * 35)
-    print(f"Count   : {len(arr)}")
-    print(f"Mean    : {arr.mean():.2f}")
-    print(f"Median  : {np.median(arr):.2f}")
-    print(f"Std Dev : {arr.std():.2f}")
+    print(f"Count   : {summary['count']}")
+    print(f"Mean    : {summary['mean']:.2f}")
+    print(f"Median  : {summary['median']:.2f}")
+    print(f"Std Dev : {summary['std']:.2f}")
 
 
 
-def plot_text_length_histogram_word(text_counts_word ,bins ,save_path: str = "outputs/visualizations/text_length_histogram_word.png"):
+def plot_text_length_histogram_word(text_counts_word ,bins ,save_path: str = "outputs/visualizations/text_length_histogram_word.png", weights=None):
     save_path = Path(save_path)
     save_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if bins.isdigit():
+    if isinstance(bins, str) and bins.isdigit():
         bins = int(bins)
 
     plt.figure()
-    plt.hist(text_counts_word, bins = bins)
+    plt.hist(text_counts_word, bins = bins, weights = weights)
     plt.title("Text Length Distribution (Words)")
     plt.xlabel("Number of Words")
     plt.ylabel("Frequency")
@@ -86,15 +101,15 @@ def plot_text_length_histogram_word(text_counts_word ,bins ,save_path: str = "ou
     plt.close()   
 
 
-def plot_text_length_histogram_char(text_counts_char , bins , save_path: str = "outputs/visualizations/text_length_histogram_char.png"):
+def plot_text_length_histogram_char(text_counts_char , bins , save_path: str = "outputs/visualizations/text_length_histogram_char.png", weights=None):
     save_path = Path(save_path)
     save_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if bins.isdigit():
+    if isinstance(bins, str) and bins.isdigit():
         bins = int(bins)
 
     plt.figure()
-    plt.hist(text_counts_char, bins = bins)
+    plt.hist(text_counts_char, bins = bins, weights = weights)
     plt.title("Text Length Distribution (Characters)")
     plt.xlabel("Number of Characters")
     plt.ylabel("Frequency")